@@ -0,0 +1,62 @@
+"""Сравнение старого пересчёта позиций (копия очередей + replay) с FilesQueue.get_user_positions.
+
+python -m benchmarks.files_queue_positions
+"""
+import asyncio
+import random
+import time
+from collections import deque
+
+from src.application.use_cases import FilesQueue
+from src.domain.entities import QueueElement
+
+
+async def noop(*args, **kwargs):
+    pass
+
+
+def replay_position(queue: FilesQueue, user_id, file_path):
+    position = 0
+    temp_queues = {uid: deque(q) for uid, q in queue.user_queues.items()}
+    temp_user_order = deque(queue.user_order)
+    while temp_user_order:
+        uid = temp_user_order.popleft()
+        if temp_queues[uid]:
+            element = temp_queues[uid].popleft()
+            if element.user_id == user_id and element.file_path == file_path:
+                return position
+            position += 1
+            if temp_queues[uid]:
+                temp_user_order.append(uid)
+    return None
+
+
+async def run(users, files):
+    queue = FilesQueue()
+    rnd = random.Random(0)
+    for i in range(files):
+        await queue.add_file_to_queue(QueueElement(user_id=rnd.randrange(users), file_path=f"file_{i}",
+                                                   callback=noop, notify_start_transcrib=noop, options={}))
+    user_id = max(queue.user_queues, key=lambda uid: len(queue.user_queues[uid]))
+    user_files = list(queue.user_queues[user_id])
+
+    started = time.perf_counter()
+    old = [replay_position(queue, user_id, f.file_path) for f in user_files]
+    old_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    new = await queue.get_user_positions(user_id)
+    new_time = time.perf_counter() - started
+
+    assert old == [new[f.file_path] for f in user_files]
+    print(f"users={users:>5} files={files:>6} user_files={len(user_files):>3} "
+          f"replay={old_time * 1000:8.2f} ms  index={new_time * 1000:6.3f} ms")
+
+
+async def main():
+    for users, files in [(100, 2000), (2000, 5000), (5000, 20000)]:
+        await run(users, files)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
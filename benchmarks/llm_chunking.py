@@ -0,0 +1,72 @@
+"""Число запросов к LLM при старой нарезке по словам (WORDS_PER_CHUNK) и при нарезке по бюджету токенов.
+
+python -m benchmarks.llm_chunking
+"""
+import random
+
+from src.infrastructure.LLM.text_chunker import estimate_tokens, split_text_by_tokens
+
+WORDS_PER_CHUNK = 1500
+CHUNK_TOKENS = 3000
+REDUCE_GROUP_SIZE = 8
+WORDS = ("сегодня мы обсуждаем новый проект и сроки его запуска команда предлагает разбить работу "
+         "на этапы чтобы первые результаты появились уже через месяц").split()
+
+
+def split_by_words(text: str) -> list[str]:
+    """Прежний AIService.split_text_by_paragraphs."""
+    chunks = []
+    current = []
+    word_count = 0
+    for para in text.split("\n\n"):
+        words = para.split()
+        if word_count + len(words) > WORDS_PER_CHUNK and current:
+            chunks.append("\n\n".join(current))
+            current = [para]
+            word_count = len(words)
+        else:
+            current.append(para)
+            word_count += len(words)
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
+
+
+def make_turns(rnd: random.Random, turns: int, words: tuple[int, int]) -> list[str]:
+    result = []
+    for _ in range(turns):
+        sentences = [" ".join(rnd.choice(WORDS) for _ in range(rnd.randint(6, 18))).capitalize() + "."
+                     for _ in range(rnd.randint(*words) // 12 + 1)]
+        result.append(f"Speaker {rnd.randrange(3)}: " + " ".join(sentences))
+    return result
+
+
+def llm_calls(chunks: int) -> int:
+    """map + уровни tree-reduce + финальный reduce."""
+    calls = chunks
+    while chunks > REDUCE_GROUP_SIZE:
+        groups = -(-chunks // REDUCE_GROUP_SIZE)
+        # группа из одной части проходит уровень без запроса
+        calls += chunks // REDUCE_GROUP_SIZE + (chunks % REDUCE_GROUP_SIZE > 1)
+        chunks = groups
+    return calls + 1
+
+
+def main():
+    rnd = random.Random(0)
+    samples = {
+        "абзацы, короткие реплики": "\n\n".join(make_turns(rnd, 1500, (5, 40))),
+        "абзацы, длинные монологи": "\n\n".join(make_turns(rnd, 60, (800, 2500))),
+        "без пустых строк": "\n".join(make_turns(rnd, 1500, (5, 40))),
+        "одной строкой": " ".join(make_turns(rnd, 1500, (5, 40))),
+    }
+    for name, text in samples.items():
+        old = split_by_words(text)
+        new = split_text_by_tokens(text, CHUNK_TOKENS)
+        print(f"{name:<26} tokens={estimate_tokens(text):>7}  "
+              f"words: chunks={len(old):>3} max={max(map(estimate_tokens, old)):>6} calls={llm_calls(len(old)):>3}  "
+              f"tokens: chunks={len(new):>3} max={max(map(estimate_tokens, new)):>5} calls={llm_calls(len(new)):>3}")
+
+
+if __name__ == '__main__':
+    main()
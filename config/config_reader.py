@@ -11,11 +11,56 @@ class Settings(BaseSettings):
     DB_NAME: str
     WHISPER_DEVICE: str
     WHISPER_MODEL: str
+    # Постоянный воркер кэширует Whisper, выравнивание, пунктуацию и MSDDDiarizer;
+    # NeuralDiarizer старых версий diarize.py по-прежнему создаётся на каждый файл
+    WHISPER_RESIDENT: bool = True
+    STREAM_DECODE: bool = True
+    MEDIA_CONCURRENCY: int = 2
+    PROBE_CONCURRENCY: int = 8
+    PREFETCH_LOOKAHEAD: int = 2
+    PREFETCH_DISK_BUDGET_MB: int = 4096
+    RENDER_WORKERS: int = 2
+    RENDER_PROCESSES: int = 2
+    UPLOAD_WORKERS: int = 4
+    PIPELINE_QUEUE_SIZE: int = 16
+    TRANSCRIBER_WORKERS: int = 1
+    CHUNKED_TRANSCRIPTION: bool = False
+    CHUNK_SPLIT_THRESHOLD: int = 1800
+    CHUNK_SECONDS: int = 600
+    CHUNK_OVERLAP: int = 15
+    CHUNK_POOL_SIZE: int = 4
+    QUEUE_POLICY: str = "round_robin"
+    QUEUE_BACKEND: str = "memory"
+    QUEUE_VISIBILITY_TIMEOUT: int = 600
+    REMOTE_TRANSCRIBERS: bool = False
+    REMOTE_HEARTBEAT_TIMEOUT: int = 120
     LLM_MODEL: str
     AUTH: str
     FOLDER_ID: str
+    LLM_MAP_CONCURRENCY: int = 4
+    LLM_REQUESTS_PER_SECOND: float = 5
+    LLM_RETRIES: int = 3
+    LLM_TOKENS_PER_MINUTE: int = 60000
+    LLM_CIRCUIT_FAILURES: int = 5
+    LLM_CIRCUIT_RESET: int = 60
+    LLM_JOBS_CONCURRENCY: int = 2
+    LLM_REDUCE_GROUP_SIZE: int = 8
+    LLM_CHUNK_TOKENS: int = 3000
+    EMBEDDING_BATCH_SIZE: int = 64
+    EMBEDDING_CONCURRENCY: int = 2
+    EMBEDDING_PASSAGE_TOKENS: int = 200
+    EMBEDDING_INDEX_DIR: str = "./data/embedding_index"
+    EMBEDDING_INDEX_MAX_PASSAGES: int = 200000
+    RETRIEVAL_TOP_K: int = 4
+    STREAM_EDIT_INTERVAL: float = 1.5
+    LLM_CACHE_DIR: str = "./data/llm_cache"
+    LLM_CACHE_MAX_MB: int = 256
+    LLM_CACHE_TTL: int = 7 * 24 * 3600
     DOWNLOADS_DIR: DirectoryPath = DirectoryPath("./data/downloads")
+    INGEST_MOVE: bool = False
     TRANSCRIPTS_DIR: DirectoryPath = DirectoryPath("./data/transcripts")
+    TRANSCRIPT_CACHE_DIR: str = "./data/transcript_cache"
+    TRANSCRIPT_CACHE_MAX_MB: int = 1024
 
     model_config = SettingsConfigDict(env_file='config/.env', env_file_encoding='utf-8')
     
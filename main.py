@@ -1,5 +1,6 @@
 import asyncio
 import logging
+import os
 from aiogram import Bot, Dispatcher, types
 from aiogram.client.session.aiohttp import AiohttpSession
 from aiogram.client.telegram import TelegramAPIServer
@@ -14,10 +15,20 @@ from src.presentation.bot.controllers import TranscribumController
 from src.application.use_cases import UserService, TranscriberQueueProcessor, FilesQueue, ApplicationService
 from src.domain.entities import User, QueueElement
 from src.infrastructure.common_services import FileService, LinkService
+from src.infrastructure.media_service import AsyncMediaService
+from src.infrastructure.render_service import ProcessRenderService
+from src.infrastructure.ingest_service import LinkingIngestService
+from src.infrastructure.transcript_cache import DiskTranscriptCache
 from src.infrastructure.transcriber.whisper_transcriber import WhisperTranscriber
+from src.infrastructure.transcriber.resident_transcriber import ResidentWhisperTranscriber
+from src.infrastructure.transcriber.chunked_transcriber import ChunkedTranscriber
 from src.infrastructure.repositories.sqlalchemy_user_repository import SQLAlchemyUserRepository
 from src.infrastructure.LLM.ai_service import AIService
+from src.infrastructure.LLM.async_ai_service import AsyncAIService
+from src.infrastructure.LLM.completion_cache import DiskCompletionCache
 from src.infrastructure.cash_repositories.cash_user_repository import CashUserRepository
+from src.infrastructure.cash_repositories.redis_job_store import RedisJobStore
+from src.infrastructure.cash_repositories.redis_job_broker import RedisJobBroker
 
 # nohup python main.py > output.log 2>&1 &
 #api-hash 528fb3e8cd77bf41d19a436cd79b7d2f
@@ -41,24 +52,96 @@ async def main():
                     types.BotCommand(command = 'check_files', description = 'Текущие файлы')
                 ])
 
-    files_queue = FilesQueue()
-    transcriber = WhisperTranscriber({'device': config.WHISPER_DEVICE,
-                                      'model': config.WHISPER_MODEL,
-                                      "transcripts_dir": config.TRANSCRIPTS_DIR})
+    files_queue = FilesQueue(policy=config.QUEUE_POLICY,
+                             store=RedisJobStore() if config.QUEUE_BACKEND == "redis" else None,
+                             visibility_timeout=config.QUEUE_VISIBILITY_TIMEOUT)
+    transcriber_cls = ResidentWhisperTranscriber if config.WHISPER_RESIDENT else WhisperTranscriber
+
+    def make_transcriber(worker_id=None):
+        settings = {'device': config.WHISPER_DEVICE,
+                    'model': config.WHISPER_MODEL,
+                    'stream_decode': config.STREAM_DECODE,
+                    "transcripts_dir": config.TRANSCRIPTS_DIR}
+        workdir = os.path.join(config.TRANSCRIPTS_DIR, f"worker_{worker_id}" if worker_id is not None else "worker")
+        if worker_id is not None:
+            settings["workdir"] = workdir
+        if not config.CHUNKED_TRANSCRIPTION:
+            return transcriber_cls(settings)
+        return ChunkedTranscriber({**settings,
+                                   'split_threshold': config.CHUNK_SPLIT_THRESHOLD,
+                                   'chunk_seconds': config.CHUNK_SECONDS,
+                                   'overlap': config.CHUNK_OVERLAP,
+                                   'pool_size': config.CHUNK_POOL_SIZE},
+                                  transcriber_factory=lambda i: transcriber_cls({**settings,
+                                                                                 "workdir": f"{workdir}_chunk_{i}"}))
+
+    transcriber = make_transcriber()
     user_service = UserService(repo=SQLAlchemyUserRepository(), cash_repo=CashUserRepository())
-    ai_service = AIService(generation_model=config.LLM_MODEL, auth=config.AUTH, folder_id=config.FOLDER_ID)
+    completion_cache = None
+    if config.LLM_CACHE_MAX_MB:
+        completion_cache = DiskCompletionCache(config.LLM_CACHE_DIR, config.LLM_CACHE_MAX_MB * 1024 * 1024,
+                                               config.LLM_CACHE_TTL)
+    ai_service = AIService(generation_model=config.LLM_MODEL, auth=config.AUTH, folder_id=config.FOLDER_ID,
+                           map_concurrency=config.LLM_MAP_CONCURRENCY,
+                           requests_per_second=config.LLM_REQUESTS_PER_SECOND,
+                           retries=config.LLM_RETRIES,
+                           reduce_group_size=config.LLM_REDUCE_GROUP_SIZE,
+                           completion_cache=completion_cache,
+                           chunk_tokens=config.LLM_CHUNK_TOKENS,
+                           embedding_batch_size=config.EMBEDDING_BATCH_SIZE,
+                           embedding_concurrency=config.EMBEDDING_CONCURRENCY,
+                           passage_tokens=config.EMBEDDING_PASSAGE_TOKENS,
+                           index_dir=config.EMBEDDING_INDEX_DIR,
+                           index_max_passages=config.EMBEDDING_INDEX_MAX_PASSAGES,
+                           top_k=config.RETRIEVAL_TOP_K,
+                           tokens_per_minute=config.LLM_TOKENS_PER_MINUTE,
+                           circuit_failures=config.LLM_CIRCUIT_FAILURES,
+                           circuit_reset=config.LLM_CIRCUIT_RESET)
+    transcript_cache = None
+    if config.TRANSCRIPT_CACHE_MAX_MB:
+        transcript_cache = DiskTranscriptCache(config.TRANSCRIPT_CACHE_DIR, config.TRANSCRIPT_CACHE_MAX_MB * 1024 * 1024)
     transcriber_service = ApplicationService(service=transcriber, 
                                              file_service=FileService, 
                                              user_service=user_service, 
                                              queue=files_queue,
                                              ai_service=ai_service,
                                              link_service=LinkService,
-                                             config = config)
+                                             config = config,
+                                             media_service=AsyncMediaService(config.MEDIA_CONCURRENCY, config.PROBE_CONCURRENCY),
+                                             transcript_cache=transcript_cache,
+                                             async_ai_service=AsyncAIService(ai_service, config.LLM_JOBS_CONCURRENCY),
+                                             render_service=ProcessRenderService(config.RENDER_PROCESSES),
+                                             ingest_service=LinkingIngestService(move=config.INGEST_MOVE))
     controller = TranscribumController(config=config, bot=bot, transcriber_service=transcriber_service)
+    files_queue.bind_callbacks(callback=controller.handle_transcription_result,
+                               notify_start_transcrib=controller.notify_start_transcrib,
+                               ai_callback=controller.handle_ai_result)
+    await files_queue.restore()
     dp.update.middleware(ControllerMiddleware(controller))
     dp.include_router(common.router)
 
-    processor = TranscriberQueueProcessor(transcriber_service)
+    if config.REMOTE_TRANSCRIBERS:
+        # транскрибацией занимаются отдельные процессы worker.py, бот только раздаёт задачи
+        processor = TranscriberQueueProcessor(transcriber_service,
+                                              workers=config.TRANSCRIBER_WORKERS,
+                                              broker=RedisJobBroker(),
+                                              heartbeat_timeout=config.REMOTE_HEARTBEAT_TIMEOUT,
+                                              prefetch_lookahead=config.PREFETCH_LOOKAHEAD,
+                                              prefetch_disk_budget=config.PREFETCH_DISK_BUDGET_MB * 1024 * 1024,
+                                              render_workers=config.RENDER_WORKERS,
+                                              upload_workers=config.UPLOAD_WORKERS,
+                                              llm_workers=config.LLM_JOBS_CONCURRENCY,
+                                              stage_queue_size=config.PIPELINE_QUEUE_SIZE)
+    else:
+        processor = TranscriberQueueProcessor(transcriber_service,
+                                              workers=config.TRANSCRIBER_WORKERS,
+                                              transcriber_factory=make_transcriber if config.TRANSCRIBER_WORKERS > 1 else None,
+                                              prefetch_lookahead=config.PREFETCH_LOOKAHEAD,
+                                              prefetch_disk_budget=config.PREFETCH_DISK_BUDGET_MB * 1024 * 1024,
+                                              render_workers=config.RENDER_WORKERS,
+                                              upload_workers=config.UPLOAD_WORKERS,
+                                              llm_workers=config.LLM_JOBS_CONCURRENCY,
+                                              stage_queue_size=config.PIPELINE_QUEUE_SIZE)
     asyncio.create_task(processor.start())
 
     await bot.delete_webhook(drop_pending_updates=True)
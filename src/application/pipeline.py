@@ -0,0 +1,93 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, List, Optional
+
+
+class PipelineStage:
+    """Стадия конвейера: своя ограниченная очередь и свой пул из workers корутин.
+
+    handler(item, worker_index) возвращает элемент для следующей стадии или None,
+    если дальше передавать нечего.
+    """
+
+    def __init__(self, name: str, handler: Callable[[Any, int], Awaitable[Any]],
+                 workers: int = 1, maxsize: int = 0):
+        self.name = name
+        self.handler = handler
+        self.workers = max(1, workers)
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.busy = 0
+        self.processed = 0
+        self.work_seconds = 0.0
+        # сколько предыдущая стадия простояла, ожидая места в очереди этой стадии
+        self.blocked_seconds = 0.0
+
+    def stats(self) -> dict:
+        return {"queued": self.queue.qsize(),
+                "busy": self.busy,
+                "workers": self.workers,
+                "processed": self.processed,
+                "avg_seconds": round(self.work_seconds / self.processed, 2) if self.processed else 0.0,
+                "blocked_seconds": round(self.blocked_seconds, 2)}
+
+
+class Pipeline:
+    """Цепочка стадий; первая стадия может брать элементы сама через source вместо своей очереди."""
+
+    def __init__(self, stages: List[PipelineStage], source: Optional[Callable[[], Awaitable[Any]]] = None):
+        self.stages = stages
+        self.source = source
+        self.tasks = []
+        self.running = False
+
+    def start(self):
+        self.running = True
+        for index, stage in enumerate(self.stages):
+            next_stage = self.stages[index + 1] if index + 1 < len(self.stages) else None
+            for worker_index in range(stage.workers):
+                take = self.source if index == 0 and self.source else stage.queue.get
+                self.tasks.append(asyncio.create_task(self._run(stage, next_stage, worker_index, take)))
+
+    async def join(self):
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+
+    def stop(self):
+        self.running = False
+        for task in self.tasks:
+            task.cancel()
+
+    async def submit(self, item):
+        await self._put(self.stages[0], item)
+
+    def is_idle(self) -> bool:
+        return all(stage.busy == 0 and stage.queue.empty() for stage in self.stages)
+
+    def stats(self) -> dict:
+        return {stage.name: stage.stats() for stage in self.stages}
+
+    async def _put(self, stage: PipelineStage, item):
+        started = time.perf_counter()
+        await stage.queue.put(item)
+        stage.blocked_seconds += time.perf_counter() - started
+
+    async def _run(self, stage: PipelineStage, next_stage: Optional[PipelineStage], worker_index: int, take):
+        while self.running:
+            item = await take()
+            if item is None:
+                await asyncio.sleep(0.5)
+                continue
+            stage.busy += 1
+            started = time.perf_counter()
+            try:
+                result = await stage.handler(item, worker_index)
+            except Exception as e:
+                logging.exception(f"Стадия {stage.name} упала: {e}")
+                result = None
+            stage.processed += 1
+            stage.work_seconds += time.perf_counter() - started
+            try:
+                if result is not None and next_stage is not None:
+                    await self._put(next_stage, result)
+            finally:
+                stage.busy -= 1
@@ -1,12 +1,19 @@
-from typing import List, Optional
+from typing import Callable, Dict, List, Optional
 import asyncio
+import bisect
+import heapq
+import itertools
+import logging
 import os
+import shutil
 from functools import partial
 from collections import deque, defaultdict
 
-from src.domain.interfaces import IUserRepository, ITranscriber, IFileService, ILinkService, IAIService, ICashUserRepository
+from src.domain.interfaces import IUserRepository, ITranscriber, IFileService, ILinkService, IAIService, IAsyncAIService, ICashUserRepository, IJobStore, IJobBroker, IMediaService, ITranscriptCache, IRenderService, IIngestService
 from src.domain.entities import User, QueueElement
-from src.domain.constants import AudioExtensions, VideoExtensions, ResultExtensions, LLMPrompts
+from src.domain.transcript import Transcript, structured_path
+from src.application.pipeline import Pipeline, PipelineStage
+from src.domain.constants import AudioExtensions, VideoExtensions, ResultExtensions, LLMPrompts, SchedulingPolicy
 
 
 class UserService:
@@ -47,19 +54,93 @@ class UserService:
     
     
 class FilesQueue:
-    def __init__(self):
+    DEFAULT_DURATION = 60
+
+    def __init__(self, policy: SchedulingPolicy = SchedulingPolicy.ROUND_ROBIN,
+                 store: Optional[IJobStore] = None, visibility_timeout: int = 600):
+        self.policy = SchedulingPolicy(policy)
+        self.store = store
+        self.visibility_timeout = visibility_timeout
+        self.callback = None
+        self.notify_start_transcrib = None
+        self.ai_callback = None
         self.user_queues = defaultdict(deque) 
         self.user_order = deque()              
+        # weighted_fair: обслуженные секунды аудио на пользователя и куча (finish_tag, seq, user_id) голов очередей,
+        # seq фиксируется при появлении пользователя в очереди и разрешает равенство finish_tag
+        self.virtual_time = {}
+        self.system_virtual_time = 0
+        self.heads = []
+        self.user_seq = {}
+        self.seq = itertools.count()
         self.lock = asyncio.Lock()
         self.not_empty = asyncio.Condition()
-        self.current_file = None
+        self.current_files = {}
+        # взятые, но не подтверждённые задачи: ack приходит только после доставки результата
+        self.in_flight = set()
+
+    def bind_callbacks(self, callback: Callable, notify_start_transcrib: Callable,
+                       ai_callback: Optional[Callable] = None):
+        """Колбэки для задач, восстановленных из хранилища: сами функции не сериализуются."""
+        self.callback = callback
+        self.notify_start_transcrib = notify_start_transcrib
+        self.ai_callback = ai_callback
+
+    async def restore(self):
+        """Возвращает в очередь все неподтверждённые задачи, включая те, что были в работе до рестарта."""
+        if not self.store:
+            return
+        for record in await self.store.load_all():
+            await self.store.release(record["job_id"])
+            await self._add_restored(record)
+
+    async def requeue_expired(self):
+        """Возвращает в очередь задачи, у которых истёк срок видимости и которые не обрабатываются локально."""
+        if not self.store:
+            return
+        for job_id in await self.store.get_expired():
+            if job_id in self.in_flight:
+                continue
+            record = await self.store.load(job_id)
+            await self.store.release(job_id)
+            if record:
+                await self._add_restored(record)
 
-    async def add_file_to_queue(self, queue_element: QueueElement):
+    async def requeue(self, queue_element: QueueElement):
+        """Возвращает взятую задачу обратно в очередь без подтверждения."""
+        self.current_files.pop(queue_element.job_id, None)
+        self.in_flight.discard(queue_element.job_id)
+        if self.store:
+            await self.store.release(queue_element.job_id)
+        await self.add_file_to_queue(queue_element, persist=False)
+
+    async def extend_in_flight(self):
+        if not self.store:
+            return
+        for job_id in list(self.in_flight):
+            await self.store.mark_in_flight(job_id, self.visibility_timeout)
+
+    async def _add_restored(self, record: dict):
+        queue_element = QueueElement.model_validate(record)
+        queue_element.callback = self.callback
+        queue_element.notify_start_transcrib = self.notify_start_transcrib
+        queue_element.ai_callback = self.ai_callback
+        await self.add_file_to_queue(queue_element, persist=False)
+
+    async def add_file_to_queue(self, queue_element: QueueElement, persist: bool = True):
+        if self.store and persist:
+            await self.store.save(queue_element.job_id, queue_element.model_dump(mode="json"))
         async with self.lock:
             user_id = queue_element.user_id
-            if not self.user_queues[user_id]:
-                self.user_order.append(user_id)  
+            is_new_user = not self.user_queues[user_id]
             self.user_queues[user_id].append(queue_element)
+            if is_new_user:
+                if self.policy == SchedulingPolicy.WEIGHTED_FAIR:
+                    self.virtual_time[user_id] = max(self.virtual_time.get(user_id, 0), self.system_virtual_time)
+                    self.user_seq[user_id] = next(self.seq)
+                    self._push_head(user_id)
+                else:
+                    self.user_order.append(user_id)
 
         async with self.not_empty:
             self.not_empty.notify()
@@ -69,41 +150,199 @@ class FilesQueue:
             await self.not_empty.wait_for(lambda: any(self.user_queues.values()))
 
         async with self.lock:
-            if not self.user_order:
-                return None
+            if self.policy == SchedulingPolicy.WEIGHTED_FAIR:
+                element = self._pop_weighted()
+            else:
+                element = self._pop_round_robin()
+            if element and self.store:
+                await self.store.mark_in_flight(element.job_id, self.visibility_timeout)
+            return element
 
-            for _ in range(len(self.user_order)):
-                user_id = self.user_order.popleft()
+    def _pop_round_robin(self) -> Optional[QueueElement]:
+        if not self.user_order:
+            return None
+
+        for _ in range(len(self.user_order)):
+            user_id = self.user_order.popleft()
+            if self.user_queues[user_id]:
+                element = self.user_queues[user_id].popleft()
                 if self.user_queues[user_id]:
-                    element = self.user_queues[user_id].popleft()
-                    if self.user_queues[user_id]:
-                        self.user_order.append(user_id)
-                    else:
-                        del self.user_queues[user_id] 
-                    return element
+                    self.user_order.append(user_id)
+                else:
+                    del self.user_queues[user_id] 
+                return element
+        return None
+
+    def _duration(self, queue_element: QueueElement) -> int:
+        if queue_element.duration is None:
+            return self.DEFAULT_DURATION
+        return max(queue_element.duration, 1)
+
+    def _push_head(self, user_id: int):
+        finish_tag = self.virtual_time[user_id] + self._duration(self.user_queues[user_id][0])
+        heapq.heappush(self.heads, (finish_tag, self.user_seq[user_id], user_id))
+
+    def _retag_head(self, queue_element: QueueElement):
+        """Пересчитывает запись кучи, если у головы очереди пользователя сменилась длительность;
+        для остальных файлов finish_tag считается при выходе в голову."""
+        if self.policy != SchedulingPolicy.WEIGHTED_FAIR:
+            return
+        user_id = queue_element.user_id
+        queue = self.user_queues.get(user_id)
+        if not queue or queue[0] is not queue_element:
+            return
+        self.heads = [head for head in self.heads if head[2] != user_id]
+        heapq.heapify(self.heads)
+        self._push_head(user_id)
+
+    def _pop_weighted(self) -> Optional[QueueElement]:
+        """Отдаёт файл с наименьшим виртуальным временем окончания (WFQ по секундам аудио)."""
+        if not self.heads:
             return None
+        _, _, user_id = heapq.heappop(self.heads)
+        element = self.user_queues[user_id].popleft()
+        self.system_virtual_time = self.virtual_time[user_id]
+        self.virtual_time[user_id] += self._duration(element)
+        if self.user_queues[user_id]:
+            self._push_head(user_id)
+        else:
+            del self.user_queues[user_id]
+            del self.user_seq[user_id]
+            if self.virtual_time[user_id] <= self.system_virtual_time:
+                del self.virtual_time[user_id]
+        return element
         
     async def get_position(self, user_id: int, file_path: str) -> Optional[int]:
         async with self.lock:
-            position = 0
-
-            temp_queues = {uid: deque(q) for uid, q in self.user_queues.items()}
-            temp_user_order = deque(self.user_order)
-
-            while temp_user_order:
-                uid = temp_user_order.popleft()
-                if temp_queues[uid]:
-                    element = temp_queues[uid].popleft()
-                    if element.user_id == user_id and element.file_path == file_path:
-                        return position
-                    position += 1
-                    if temp_queues[uid]:
-                        temp_user_order.append(uid)
-            return None  
-        
+            return self._user_positions(user_id).get(file_path)
+
+    async def get_user_positions(self, user_id: int) -> Dict[str, int]:
+        async with self.lock:
+            return self._user_positions(user_id)
+
+    def _user_positions(self, user_id: int) -> Dict[str, int]:
+        if self.policy == SchedulingPolicy.WEIGHTED_FAIR:
+            return self._weighted_positions(user_id)
+        return self._round_robin_positions(user_id)
+
+    def _round_robin_positions(self, user_id: int) -> Dict[str, int]:
+        """Позиции всех файлов пользователя за один проход по user_order без копирования очередей.
+
+        k-й файл пользователя уходит в k-м раунде, поэтому перед ним стоят
+        sum(min(L_j, k)) файлов предыдущих раундов и те пользователи раньше него
+        в user_order, у которых файлов больше k.
+        """
+        queue = self.user_queues.get(user_id)
+        if not queue:
+            return {}
+        n = len(queue)
+        longer = [0] * (n + 1)
+        longer_before = [0] * (n + 1)
+        seen = False
+        for uid in self.user_order:
+            if uid == user_id:
+                seen = True
+            length = min(len(self.user_queues[uid]), n)
+            longer[length] += 1
+            if not seen:
+                longer_before[length] += 1
+        # longer[k] — сколько пользователей имеют больше k файлов
+        for k in range(n - 1, -1, -1):
+            longer[k] += longer[k + 1]
+            longer_before[k] += longer_before[k + 1]
+
+        positions = {}
+        previous_rounds = 0
+        for k, element in enumerate(queue):
+            positions.setdefault(element.file_path, previous_rounds + longer_before[k + 1])
+            previous_rounds += longer[k + 1]
+        return positions
+
+    def _weighted_positions(self, user_id: int) -> Dict[str, int]:
+        """Без новых поступлений WFQ отдаёт файлы в порядке (finish_tag, seq), поэтому
+        позиция файла — число файлов других пользователей с меньшим ключом."""
+        if user_id not in self.user_seq:
+            return {}
+
+        def keys(uid):
+            finish_tag = self.virtual_time[uid]
+            for element in self.user_queues[uid]:
+                finish_tag += self._duration(element)
+                yield (finish_tag, self.user_seq[uid])
+
+        own = list(keys(user_id))
+        ahead = [0] * (len(own) + 1)
+        for uid in self.user_seq:
+            if uid == user_id:
+                continue
+            for key in keys(uid):
+                index = bisect.bisect_right(own, key)
+                if index == len(own):
+                    break
+                ahead[index] += 1
+
+        positions = {}
+        others = 0
+        for k, element in enumerate(self.user_queues[user_id]):
+            others += ahead[k]
+            positions.setdefault(element.file_path, k + others)
+        return positions
+
     def get_user_files_from_queue(self, user_id: int):
         return self.user_queues[user_id]
 
+    async def peek_next(self, count: int) -> List[QueueElement]:
+        """Следующие count файлов в порядке выдачи, без извлечения из очереди."""
+        async with self.lock:
+            if self.policy == SchedulingPolicy.WEIGHTED_FAIR:
+                def keyed(uid):
+                    finish_tag = self.virtual_time[uid]
+                    for element in self.user_queues[uid]:
+                        finish_tag += self._duration(element)
+                        yield (finish_tag, self.user_seq[uid]), element
+                merged = heapq.merge(*(keyed(uid) for uid in self.user_seq), key=lambda item: item[0])
+                return [element for _, element in itertools.islice(merged, count)]
+
+            upcoming = []
+            round_number = 0
+            while len(upcoming) < count:
+                round_elements = [self.user_queues[uid][round_number] for uid in self.user_order
+                                  if len(self.user_queues[uid]) > round_number]
+                if not round_elements:
+                    break
+                upcoming.extend(round_elements[:count - len(upcoming)])
+                round_number += 1
+            return upcoming
+
+    async def update(self, queue_element: QueueElement, duration: Optional[int] = None):
+        """Сохраняет изменения задачи, которая ещё лежит в очереди (например, новый file_path после конвертации).
+
+        Длительность меняется только здесь, под lock: от неё зависит finish_tag в куче WFQ.
+        """
+        async with self.lock:
+            if duration is not None and duration != queue_element.duration:
+                queue_element.duration = duration
+                self._retag_head(queue_element)
+        if self.store:
+            await self.store.save(queue_element.job_id, queue_element.model_dump(mode="json"))
+
+    def mark_started(self, queue_element: QueueElement):
+        self.current_files[queue_element.job_id] = queue_element
+        self.in_flight.add(queue_element.job_id)
+
+    async def mark_finished(self, queue_element: QueueElement):
+        """Транскрибация закончена: файл больше не показывается как текущий, но задача ещё не подтверждена."""
+        self.current_files.pop(queue_element.job_id, None)
+
+    async def ack(self, queue_element: QueueElement):
+        """Результат доставлен: задача удаляется из хранилища и после рестарта не повторится."""
+        self.in_flight.discard(queue_element.job_id)
+        if self.store:
+            await self.store.ack(queue_element.job_id)
+
+    def get_user_current_files(self, user_id: int) -> List[str]:
+        return [element.file_path for element in self.current_files.values() if element.user_id == user_id]
+
     
 class ApplicationService:
     def __init__(self, service: ITranscriber, 
@@ -112,32 +351,125 @@ class ApplicationService:
                  queue: FilesQueue, 
                  link_service: ILinkService,
                  ai_service: IAIService,
-                 config):
+                 config,
+                 media_service: Optional[IMediaService] = None,
+                 transcript_cache: Optional[ITranscriptCache] = None,
+                 async_ai_service: Optional[IAsyncAIService] = None,
+                 render_service: Optional[IRenderService] = None,
+                 ingest_service: Optional[IIngestService] = None):
         self.service = service
         self.file_service = file_service
         self.user_service = user_service
         self.link_service = link_service
         self.queue = queue
         self.ai_service = ai_service
+        self.async_ai_service = async_ai_service
+        self.render_service = render_service
+        self.ingest_service = ingest_service
+        self.media_service = media_service
+        self.transcript_cache = transcript_cache
         self.config = config
         self.transcripts_path = config.TRANSCRIPTS_DIR
     
-    async def transcribe(self, file_path, user_adapter_id, delete_input_file=False, needed_formats = []):
+    async def transcribe(self, file_path, user_adapter_id, delete_input_file=False, needed_formats = [],
+                         transcriber: Optional[ITranscriber] = None, transcripts_path = None, cache_key = None):
         if not self.is_extension_correct(file_path):
             self.file_service.delete_files(file_path)
             return None
-        wav_filepath = self.file_service.covert_media_to_wav(filepath=file_path)
-        path_to_transcrib = await self.get_user_path(user_adapter_id=user_adapter_id, base_path=self.transcripts_path)
-        self.service.set_transcrib_path(path_to_transcrib)
+        transcriber = transcriber or self.service
+        path_to_transcrib = await self.get_user_path(user_adapter_id=user_adapter_id,
+                                                     base_path=transcripts_path or self.transcripts_path)
+        if self.transcript_cache:
+            cache_key = cache_key or await self.make_cache_key(file_path)
+            cached = os.path.join(path_to_transcrib, f"{os.path.splitext(os.path.basename(file_path))[0]}.txt")
+            if await asyncio.to_thread(self.transcript_cache.get, cache_key, cached):
+                if not os.path.exists(structured_path(cached)):
+                    await asyncio.to_thread(self.build_structured_transcript, cached)
+                if delete_input_file:
+                    self.file_service.delete_files(file_path)
+                return await self.render_formats(base_file=cached, formats=needed_formats)
+        if transcriber.accepts_media:
+            wav_filepath = file_path
+        else:
+            wav_filepath = await self.covert_media_to_wav(file_path)
+        transcriber.set_transcrib_path(path_to_transcrib)
         result = await asyncio.to_thread(partial(
-                                self.service.transcribe,
+                                transcriber.transcribe,
                                 file_path = wav_filepath
                                     ))
         if delete_input_file:
             self.file_service.delete_files(wav_filepath)
-        all_files = self.prepare_needed_fromats(base_file=result, formats=needed_formats)
+        if result:
+            await asyncio.to_thread(self.build_structured_transcript, result)
+        if cache_key and result:
+            await asyncio.to_thread(self.transcript_cache.put, cache_key, result)
+        all_files = await self.render_formats(base_file=result, formats=needed_formats)
         return all_files
     
+    def build_structured_transcript(self, txt_path):
+        """Собирает .trs из .srt, который diarize.py пишет рядом с .txt; дальше рендер и LLM читают его."""
+        srt_path = os.path.splitext(txt_path)[0] + ".srt"
+        if not os.path.exists(srt_path):
+            return None
+        try:
+            Transcript.from_srt(srt_path).write(structured_path(txt_path))
+        except Exception as e:
+            logging.error(f"Не удалось собрать {structured_path(txt_path)}: {e}")
+            return None
+        return structured_path(txt_path)
+
+    async def make_cache_key(self, file_path):
+        return await asyncio.to_thread(self.transcript_cache.make_key, file_path, self.transcript_options())
+
+    def transcript_options(self):
+        """Все настройки, от которых зависит текст транскрипта: смена любой из них даёт новый ключ кэша."""
+        options = {"model": self.config.WHISPER_MODEL,
+                   "device": self.config.WHISPER_DEVICE,
+                   "stream_decode": self.config.STREAM_DECODE,
+                   "chunked": self.config.CHUNKED_TRANSCRIPTION}
+        if self.config.CHUNKED_TRANSCRIPTION:
+            options.update(split_threshold=self.config.CHUNK_SPLIT_THRESHOLD,
+                           chunk_seconds=self.config.CHUNK_SECONDS,
+                           overlap=self.config.CHUNK_OVERLAP)
+        return options
+
+    async def get_media_duration(self, file_path):
+        if self.media_service:
+            return await self.media_service.get_media_duration(file_path)
+        return await asyncio.to_thread(self.file_service.get_media_duration, file_path)
+
+    async def covert_media_to_wav(self, file_path):
+        if self.media_service:
+            return await self.media_service.covert_media_to_wav(file_path)
+        return await asyncio.to_thread(self.file_service.covert_media_to_wav, file_path)
+
+    async def generate_ai_answer(self, file_path, prompt):
+        if self.async_ai_service:
+            return await self.async_ai_service.generate_remote_api_answer(file_path, prompt)
+        return await asyncio.to_thread(self.ai_service.generate_remote_api_answer, file_path, prompt)
+
+    async def generate_ai_answers(self, file_path, prompts, on_progress=None):
+        """on_progress вызывается в event loop, хотя генерация идёт в рабочих потоках."""
+        if on_progress:
+            loop = asyncio.get_running_loop()
+            on_progress = partial(loop.call_soon_threadsafe, on_progress)
+        if self.async_ai_service:
+            return await self.async_ai_service.generate_remote_api_answers(file_path, prompts, on_progress)
+        return await asyncio.to_thread(self.ai_service.generate_remote_api_answers, file_path, prompts, on_progress)
+
+    async def ingest_file(self, src, dst):
+        if self.ingest_service:
+            return await self.ingest_service.ingest(src, dst)
+        await asyncio.to_thread(shutil.copy2, src, dst)
+        return dst
+
+    async def render_formats(self, base_file, formats=[]):
+        if not base_file or not formats:
+            return [base_file]
+        if self.render_service:
+            return await self.render_service.render(base_file, formats)
+        return await asyncio.to_thread(self.prepare_needed_fromats, base_file=base_file, formats=formats)
+
     def prepare_needed_fromats(self, base_file, formats=[]):
         all_files = [base_file]
         for ext in formats:
@@ -151,11 +483,11 @@ class ApplicationService:
         supported = {e.value for e in (*AudioExtensions, *VideoExtensions)}
         return ext in supported
     
-    async def prepare_transcription_request(self, options, file_path: str, user_id: int, callback: callable, notify_start_transcrib: callable, on_insufficient_funds: callable, on_wrong_format: callable):
+    async def prepare_transcription_request(self, options, file_path: str, user_id: int, callback: callable, notify_start_transcrib: callable, on_insufficient_funds: callable, on_wrong_format: callable, ai_callback: callable = None):
         if not self.is_extension_correct(file_path):
             await on_wrong_format(user_id)
             return
-        file_duration = self.file_service.get_media_duration(file_path)
+        file_duration = await self.get_media_duration(file_path)
         paid_minutes = await self.user_service.get_paid_minutes(id=user_id)
         # if paid_minutes < file_duration:
         #     await on_insufficient_funds(user_id)
@@ -163,8 +495,10 @@ class ApplicationService:
         #     return
         queue_element = QueueElement(user_id=user_id, 
                                      file_path=file_path, 
+                                     duration=file_duration,
                                      callback=callback, 
                                      notify_start_transcrib=notify_start_transcrib,
+                                     ai_callback=ai_callback,
                                      options=options)
         await self.queue.add_file_to_queue(queue_element)
 
@@ -174,11 +508,43 @@ class ApplicationService:
         return path
 
 
+class WorkerLostError(Exception):
+    pass
+
+
 class TranscriberQueueProcessor:
-    def __init__(self, transcriber_service: ApplicationService):
+    def __init__(self, transcriber_service: ApplicationService, workers: int = 1,
+                 transcriber_factory: Optional[Callable[[int], ITranscriber]] = None,
+                 broker: Optional[IJobBroker] = None, heartbeat_timeout: int = 120,
+                 prefetch_lookahead: int = 0, prefetch_disk_budget: int = 0,
+                 render_workers: int = 1, upload_workers: int = 4, llm_workers: int = 2,
+                 stage_queue_size: int = 16):
         self.application_service = transcriber_service
         self.files_queue : FilesQueue = self.application_service.queue
         self.user_service : UserService = self.application_service.user_service
+        self.workers = max(1, workers)
+        self.transcriber_factory = transcriber_factory
+        # при заданном брокере workers — число задач, одновременно отданных удалённым воркерам
+        self.broker = broker
+        self.heartbeat_timeout = heartbeat_timeout
+        self.pending_results = {}
+        self.last_heartbeat = {}
+        # подготовка следующих файлов очереди, пока воркеры заняты текущими
+        self.prefetch_lookahead = prefetch_lookahead
+        self.prefetch_disk_budget = prefetch_disk_budget
+        self.prefetch_tasks = {}
+        self.prefetched_sizes = {}
+        # транскрибация -> рендер форматов -> загрузка в Telegram -> LLM работают независимо:
+        # долгие запросы к YandexGPT не занимают воркеров, отправляющих готовые файлы
+        self.transcribers = []
+        self.pipeline = Pipeline(stages=[PipelineStage("transcribe", self.transcribe_stage, workers=self.workers),
+                                         PipelineStage("render", self.render_stage, workers=render_workers,
+                                                       maxsize=stage_queue_size),
+                                         PipelineStage("upload", self.upload_stage, workers=upload_workers,
+                                                       maxsize=stage_queue_size),
+                                         PipelineStage("llm", self.llm_stage, workers=llm_workers,
+                                                       maxsize=stage_queue_size)],
+                                 source=self.files_queue.get_file_from_queue)
         self.running = False
         self.active_tasks = 0
         self.task_lock = asyncio.Lock()
@@ -190,38 +556,288 @@ class TranscriberQueueProcessor:
                 is_empty = not any(self.files_queue.user_queues.values())
             
             async with self.task_lock:
-                no_active_tasks = self.active_tasks == 0
+                no_active_tasks = self.active_tasks == 0 and self.pipeline.is_idle()
 
             if is_empty and no_active_tasks:
                 self.application_service.file_service.delete_all_from_folders(self.application_service.config.DOWNLOADS_DIR,
                                                                               self.application_service.config.TRANSCRIPTS_DIR)
 
+    async def monitor_visibility(self):
+        interval = max(1, self.files_queue.visibility_timeout // 3)
+        while self.running:
+            await asyncio.sleep(interval)
+            try:
+                await self.files_queue.extend_in_flight()
+                await self.files_queue.requeue_expired()
+            except Exception as e:
+                logging.error(f"Ошибка продления задач очереди: {e}")
+
+    async def monitor_pipeline(self, interval: int = 60):
+        while self.running:
+            await asyncio.sleep(interval)
+            if not self.pipeline.is_idle():
+                logging.info(f"Стадии конвейера: {self.pipeline.stats()}")
+
     async def start(self):
         self.running = True
         monitor_task = asyncio.create_task(self.monitor_queue())
+        visibility_task = asyncio.create_task(self.monitor_visibility())
+        pipeline_task = asyncio.create_task(self.monitor_pipeline())
+        results_task = asyncio.create_task(self.listen_results()) if self.broker else None
+        prefetch_task = asyncio.create_task(self.prefetch_queue()) if self.prefetch_lookahead else None
+        for worker_id in range(self.workers):
+            if self.transcriber_factory:
+                transcriber = self.transcriber_factory(worker_id)
+                transcripts_path = os.path.join(self.application_service.transcripts_path, f"worker_{worker_id}")
+            else:
+                transcriber, transcripts_path = None, None
+            self.transcribers.append((transcriber, transcripts_path))
+        self.pipeline.start()
+        await self.pipeline.join()
+        monitor_task.cancel()
+        visibility_task.cancel()
+        pipeline_task.cancel()
+        if results_task:
+            results_task.cancel()
+        if prefetch_task:
+            prefetch_task.cancel()
+
+    async def prefetch_queue(self):
         while self.running:
-            queue_item : QueueElement = await self.files_queue.get_file_from_queue()
-            if queue_item is None:
-                await asyncio.sleep(0.5)
+            await asyncio.sleep(1)
+            try:
+                upcoming = await self.files_queue.peek_next(self.prefetch_lookahead)
+            except Exception as e:
+                logging.error(f"Ошибка предзагрузки очереди: {e}")
                 continue
+            for queue_item in upcoming:
+                if queue_item.job_id in self.prefetch_tasks:
+                    continue
+                if self.prefetch_disk_budget and sum(self.prefetched_sizes.values()) >= self.prefetch_disk_budget:
+                    break
+                self.prefetch_tasks[queue_item.job_id] = asyncio.create_task(self.prefetch(queue_item))
+
+    async def prefetch(self, queue_item: QueueElement):
+        """Хэш для кэша, длительность и WAV (если транскрибер не читает медиа сам) считаются заранее."""
+        try:
+            if self.application_service.transcript_cache and not queue_item.content_hash:
+                queue_item.content_hash = await self.application_service.make_cache_key(queue_item.file_path)
+            duration = None
+            if queue_item.duration is None:
+                duration = await self.application_service.get_media_duration(queue_item.file_path)
+            if not self.application_service.service.accepts_media:
+                wav_filepath = await self.application_service.covert_media_to_wav(queue_item.file_path)
+                if wav_filepath and wav_filepath != queue_item.file_path:
+                    queue_item.file_path = wav_filepath
+                    self.prefetched_sizes[queue_item.job_id] = os.path.getsize(wav_filepath)
+            await self.files_queue.update(queue_item, duration=duration)
+        except Exception as e:
+            logging.error(f"Ошибка предварительной обработки {queue_item.file_path}: {e}")
+
+    async def wait_prefetched(self, queue_item: QueueElement):
+        """Если файл не готовили заранее, готовит сейчас: путь к WAV сохраняется в хранилище
+        до транскрибации, и задача, восстановленная после рестарта, найдёт свой файл."""
+        task = self.prefetch_tasks.get(queue_item.job_id)
+        if task:
+            await task
+        elif not self.broker:
+            await self.prefetch(queue_item)
+
+    def release_prefetched(self, queue_item: QueueElement):
+        self.prefetch_tasks.pop(queue_item.job_id, None)
+        self.prefetched_sizes.pop(queue_item.job_id, None)
+
+    async def listen_results(self):
+        while self.running:
             try:
-                async with self.task_lock:
-                    self.active_tasks += 1
-                await queue_item.notify_start_transcrib(id = queue_item.user_id, file_name = os.path.basename(queue_item.file_path))
-                self.files_queue.current_file = queue_item
+                result = await self.broker.consume_result(timeout=5)
+            except Exception as e:
+                logging.error(f"Ошибка чтения результатов воркеров: {e}")
+                await asyncio.sleep(1)
+                continue
+            if result is None:
+                continue
+            job_id = result["job_id"]
+            future = self.pending_results.get(job_id)
+            if future is None:
+                logging.warning(f"Результат для неизвестной задачи {job_id}")
+                continue
+            self.last_heartbeat[job_id] = asyncio.get_running_loop().time()
+            if not result.get("heartbeat") and not future.done():
+                future.set_result(result)
+
+    async def transcribe_remote(self, queue_item: QueueElement):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.pending_results[queue_item.job_id] = future
+        claimed_at = None
+        try:
+            await self.broker.publish_job(queue_item.model_dump(mode="json"))
+            while not future.done():
+                await asyncio.wait({future}, timeout=self.heartbeat_timeout / 4)
+                if future.done():
+                    break
+                last_heartbeat = self.last_heartbeat.get(queue_item.job_id)
+                if last_heartbeat:
+                    if loop.time() - last_heartbeat > self.heartbeat_timeout:
+                        raise WorkerLostError(queue_item.job_id)
+                    continue
+                # пока задача лежит у брокера, heartbeat'ов нет и это не считается потерей воркера;
+                # если её забрали, но первого heartbeat нет дольше heartbeat_timeout, воркер умер сразу после BLPOP
+                if claimed_at is None and not await self.is_queued(queue_item.job_id):
+                    claimed_at = loop.time()
+                if claimed_at is not None and loop.time() - claimed_at > self.heartbeat_timeout:
+                    raise WorkerLostError(queue_item.job_id)
+        finally:
+            self.pending_results.pop(queue_item.job_id, None)
+            self.last_heartbeat.pop(queue_item.job_id, None)
+        result = future.result()
+        if result["error"]:
+            raise RuntimeError(result["error"])
+        return result["output_files"]
+
+    async def is_queued(self, job_id: str) -> bool:
+        try:
+            return await self.broker.is_queued(job_id)
+        except Exception as e:
+            logging.error(f"Ошибка проверки задачи {job_id} у брокера: {e}")
+            return True
+
+    async def transcribe_stage(self, queue_item: QueueElement, worker_index: int):
+        transcriber, transcripts_path = self.transcribers[worker_index]
+        try:
+            async with self.task_lock:
+                self.active_tasks += 1
+            await queue_item.notify_start_transcrib(id = queue_item.user_id, file_name = os.path.basename(queue_item.file_path))
+            self.files_queue.mark_started(queue_item)
+            await self.wait_prefetched(queue_item)
+            if self.broker:
+                # удалённый воркер сам готовит нужные форматы
+                output_files = await self.transcribe_remote(queue_item)
+            else:
+                # входной файл удаляется только после ack: до тех пор задачу можно повторить
                 output_files = await self.application_service.transcribe(file_path=queue_item.file_path,
-                                                            delete_input_file = True,
+                                                            delete_input_file = False,
                                                             user_adapter_id = queue_item.user_id,
-                                                            needed_formats = queue_item.options["formats"])
-                await queue_item.callback(output_files, None, queue_item.user_id, ai_jobs = queue_item.options["prompts"])
-            except Exception as e:
-                 await queue_item.callback(None, e, queue_item.user_id)
+                                                            transcriber = transcriber,
+                                                            transcripts_path = transcripts_path,
+                                                            cache_key = queue_item.content_hash)
+            await self.files_queue.mark_finished(queue_item)
+            return queue_item, output_files, None
+        except WorkerLostError:
+            logging.warning(f"Воркер перестал отвечать, задача {queue_item.job_id} возвращена в очередь")
+            await self.files_queue.requeue(queue_item)
+            return None
+        except Exception as e:
+            await self.files_queue.mark_finished(queue_item)
+            return queue_item, None, e
+        finally:
+            self.release_prefetched(queue_item)
+            async with self.task_lock:
+                self.active_tasks -= 1
+
+    async def render_stage(self, job, worker_index: int):
+        queue_item, output_files, error = job
+        if error or self.broker or not output_files or not output_files[0]:
+            return job
+        try:
+            output_files = await self.application_service.render_formats(base_file=output_files[0],
+                                                                         formats=queue_item.options["formats"])
+        except Exception as e:
+            return queue_item, None, e
+        return queue_item, output_files, None
+
+    async def upload_stage(self, job, worker_index: int):
+        """Отправляет файлы; задачи с промптами дальше идут в стадию llm, остальные здесь подтверждаются."""
+        queue_item, output_files, error = job
+        prompts = [] if error else queue_item.options["prompts"]
+        if not prompts:
+            try:
+                await queue_item.callback(output_files, error, queue_item.user_id)
             finally:
-                async with self.task_lock:
-                    self.active_tasks -= 1
-        monitor_task.cancel()
+                await self.complete(queue_item)
+            return None
+        try:
+            await queue_item.callback(output_files, None, queue_item.user_id, keep_files=True)
+        except Exception as e:
+            logging.error(f"Ошибка отправки файлов задачи {queue_item.job_id}: {e}")
+        return job
+
+    async def llm_stage(self, job, worker_index: int):
+        queue_item, output_files, _ = job
+        try:
+            await queue_item.ai_callback(output_files, queue_item.user_id, queue_item.options["prompts"])
+        finally:
+            await self.complete(queue_item)
+
+    async def complete(self, queue_item: QueueElement):
+        """Подтверждает задачу после доставки; при падении раньше она вернётся в очередь вместе с файлом."""
+        await self.files_queue.ack(queue_item)
+        if not self.broker:
+            self.application_service.file_service.delete_files(queue_item.file_path)
 
     def stop(self):
         self.running = False
+        self.pipeline.stop()
+
+
+class TranscriptionWorker:
+    """Воркер для отдельного узла: берёт задачи у брокера, пишет транскрипты в общее хранилище
+    и отправляет боту пути к готовым файлам."""
+    HEARTBEAT_INTERVAL = 30
+    MAX_BACKOFF = 60
+
+    def __init__(self, application_service: ApplicationService, broker: IJobBroker,
+                 transcriber: Optional[ITranscriber] = None, transcripts_path: Optional[str] = None):
+        self.application_service = application_service
+        self.broker = broker
+        self.transcriber = transcriber
+        self.transcripts_path = transcripts_path
+        self.running = False
 
+    async def heartbeat(self, job_id: str):
+        while True:
+            try:
+                await self.broker.publish_result({"job_id": job_id, "heartbeat": True})
+            except Exception as e:
+                logging.error(f"Не удалось отправить heartbeat задачи {job_id}: {e}")
+            await asyncio.sleep(self.HEARTBEAT_INTERVAL)
 
+    async def start(self):
+        self.running = True
+        backoff = 1
+        while self.running:
+            try:
+                record = await self.broker.consume_job(timeout=5)
+            except Exception as e:
+                logging.error(f"Ошибка получения задачи от брокера: {e}, повтор через {backoff} c")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, self.MAX_BACKOFF)
+                continue
+            backoff = 1
+            if record is None:
+                continue
+            queue_item = QueueElement.model_validate(record)
+            heartbeat_task = asyncio.create_task(self.heartbeat(queue_item.job_id))
+            try:
+                output_files = await self.application_service.transcribe(file_path=queue_item.file_path,
+                                                                         delete_input_file = True,
+                                                                         user_adapter_id = queue_item.user_id,
+                                                                         needed_formats = queue_item.options["formats"],
+                                                                         transcriber = self.transcriber,
+                                                                         transcripts_path = self.transcripts_path,
+                                                                         cache_key = queue_item.content_hash)
+                result = {"job_id": queue_item.job_id, "output_files": output_files, "error": None}
+            except Exception as e:
+                logging.error(f"Ошибка транскрибации {queue_item.file_path}: {e}")
+                result = {"job_id": queue_item.job_id, "output_files": None, "error": str(e)}
+            finally:
+                heartbeat_task.cancel()
+            try:
+                await self.broker.publish_result(result)
+            except Exception as e:
+                # бот не получит ни результата, ни heartbeat'ов и вернёт задачу в очередь сам
+                logging.error(f"Не удалось отправить результат задачи {queue_item.job_id}: {e}")
+
+    def stop(self):
+        self.running = False
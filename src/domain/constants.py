@@ -20,9 +20,17 @@ class VideoExtensions(StrEnum):
 class ResultExtensions(StrEnum):
     PDF = 'pdf'
     DOCX = 'docx'
+    SRT = 'srt'
+    VTT = 'vtt'
     
+class SchedulingPolicy(StrEnum):
+    """Порядок выдачи файлов из очереди"""
+    ROUND_ROBIN = 'round_robin'
+    WEIGHTED_FAIR = 'weighted_fair'
+
 class LLMPrompts(StrEnum):
     MAKE_POST = "Напиши пост для социальной сети на основе этих данных"
     MAKE_SUMMARY = "Напиши краткое содержание на основе этих данных"
     MAKE_POST_SHORT = "p"
-    MAKE_SUMMURY_SHORT = "s"
\ No newline at end of file
+    MAKE_SUMMURY_SHORT = "s"
+    CONDENSE_CHUNK = "Сожми этот фрагмент, сохранив ключевые факты, имена, цифры и выводы"
@@ -1,3 +1,4 @@
+from uuid import uuid4
 from typing import Optional, Callable, List, Dict
 from pydantic import BaseModel, ConfigDict, Field, field_validator
 
@@ -12,9 +13,13 @@ class User(BaseModel):
     ai_jobs: List[str] | None = []
 
 class QueueElement(BaseModel):
+    job_id: str = Field(default_factory=lambda: uuid4().hex)
     user_id: int 
     file_path: str
-    callback: Callable
-    notify_start_transcrib: Callable
+    duration: Optional[int] = None
+    content_hash: Optional[str] = None
+    callback: Optional[Callable] = Field(default=None, exclude=True)
+    notify_start_transcrib: Optional[Callable] = Field(default=None, exclude=True)
+    ai_callback: Optional[Callable] = Field(default=None, exclude=True)
     options: Dict[str, List[str]]
 
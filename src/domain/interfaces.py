@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import List
+from typing import Callable, Dict, List, Optional
 from .entities import User
 
 class IUserRepository(ABC):
@@ -61,6 +61,9 @@ class ICashUserRepository(ABC):
 
 
 class ITranscriber(ABC):
+    # True — transcribe принимает исходный медиафайл и сам декодирует его в 16 кГц моно
+    accepts_media: bool = False
+
     @abstractmethod
     def transcribe(self, file_path: str) ->  str: pass
 
@@ -98,6 +101,57 @@ class IFileService(ABC):
     def convert_txt_to_ext(cls, txt_path : str, ext : str) -> str | None: pass
 
 
+class IMediaService(ABC):
+    """Асинхронные probe/convert из IFileService, не блокирующие event loop."""
+    @abstractmethod
+    async def get_media_duration(self, file_path: str) -> int | None: pass
+
+    @abstractmethod
+    async def covert_media_to_wav(self, filepath: str) -> str: pass
+
+
+class IIngestService(ABC):
+    @abstractmethod
+    async def ingest(self, src: str, dst: str) -> str:
+        """Помещает файл src по пути dst, по возможности без копирования данных; возвращает dst."""
+        pass
+
+
+class IRenderService(ABC):
+    @abstractmethod
+    async def render(self, txt_path: str, formats: List[str]) -> List[str]:
+        """Готовит файлы нужных форматов из транскрипта; возвращает [txt_path, *созданные файлы]."""
+        pass
+
+
+class ITranscriptCache(ABC):
+    @abstractmethod
+    def make_key(self, file_path: str, options: dict) -> str: pass
+
+    @abstractmethod
+    def get(self, key: str, dest_path: str) -> bool:
+        """Копирует закэшированный транскрипт в dest_path, а его .srt/.trs рядом; False при промахе."""
+        pass
+
+    @abstractmethod
+    def put(self, key: str, transcript_path: str) -> None:
+        """Сохраняет .txt и лежащие рядом .srt/.trs."""
+        pass
+
+
+class ICompletionCache(ABC):
+    @abstractmethod
+    def make_key(self, model: str, temperature: float, messages: List[dict]) -> str: pass
+
+    @abstractmethod
+    def get(self, key: str) -> str | None:
+        """Текст закэшированного ответа модели; None при промахе или истёкшем TTL."""
+        pass
+
+    @abstractmethod
+    def put(self, key: str, text: str) -> None: pass
+
+
 class ILinkService(ABC):
 
     @classmethod
@@ -132,7 +186,74 @@ class IAIService(ABC):
     @abstractmethod
     def generate_remote_api_answer(self, file_path : str, prompt : str) -> str: pass
 
+    @abstractmethod
+    def generate_remote_api_answers(self, file_path: str, prompts: List[str],
+                                    on_progress: Optional[Callable[[Optional[str], str], None]] = None) -> Dict[str, str]:
+        """Ответы на несколько промптов по одному файлу; map-стадия по частям выполняется один раз.
+
+        on_progress(None, status) — ход обработки, on_progress(prompt, text) — ответ по мере генерации.
+        """
+        pass
+
+
+class IAsyncAIService(ABC):
+    @abstractmethod
+    async def generate_remote_api_answer(self, file_path: str, prompt: str) -> str:
+        """То же, что IAIService.generate_remote_api_answer, но не блокирует event loop."""
+        pass
+
+    @abstractmethod
+    async def generate_remote_api_answers(self, file_path: str, prompts: List[str],
+                                          on_progress: Optional[Callable[[Optional[str], str], None]] = None
+                                          ) -> Dict[str, str]: pass
+
+
+
+
 
 
 
+class IJobStore(ABC):
+    @abstractmethod
+    async def save(self, job_id: str, record: dict) -> None: pass
+
+    @abstractmethod
+    async def load(self, job_id: str) -> dict | None: pass
+
+    @abstractmethod
+    async def load_all(self) -> List[dict]: pass
 
+    @abstractmethod
+    async def mark_in_flight(self, job_id: str, timeout: int) -> None:
+        """Скрывает задачу на timeout секунд; повторный вызов продлевает срок."""
+        pass
+
+    @abstractmethod
+    async def get_expired(self) -> List[str]:
+        """Возвращает id задач, срок видимости которых истёк."""
+        pass
+
+    @abstractmethod
+    async def release(self, job_id: str) -> None: pass
+
+    @abstractmethod
+    async def ack(self, job_id: str) -> None: pass
+
+
+class IJobBroker(ABC):
+    @abstractmethod
+    async def publish_job(self, record: dict) -> None: pass
+
+    @abstractmethod
+    async def consume_job(self, timeout: int) -> dict | None: pass
+
+    @abstractmethod
+    async def is_queued(self, job_id: str) -> bool:
+        """True, пока задачу не забрал ни один воркер."""
+        pass
+
+    @abstractmethod
+    async def publish_result(self, result: dict) -> None: pass
+
+    @abstractmethod
+    async def consume_result(self, timeout: int) -> dict | None: pass
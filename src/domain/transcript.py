@@ -0,0 +1,179 @@
+import json
+import os
+import re
+import struct
+import sys
+from array import array
+from typing import Iterable, Iterator, Tuple
+
+SRT_TIME = re.compile(r"(\d+):(\d+):(\d+)[,.](\d+)")
+
+Segment = Tuple[int, int, str, str]
+
+
+def srt_time_to_ms(value: str) -> int:
+    h, m, s, fraction = SRT_TIME.match(value.strip()).groups()
+    # дробная часть — доли секунды: "1.5" это 500 мс, а не 5
+    return ((int(h) * 60 + int(m)) * 60 + int(s)) * 1000 + int(fraction.ljust(3, "0")[:3])
+
+
+def ms_to_srt_time(value: int, separator: str = ",") -> str:
+    s, ms = divmod(int(value), 1000)
+    m, s = divmod(s, 60)
+    h, m = divmod(m, 60)
+    return f"{h:02d}:{m:02d}:{s:02d}{separator}{ms:03d}"
+
+
+def _parse_srt_block(block: list[str]) -> Segment | None:
+    if len(block) < 3 or "-->" not in block[1]:
+        return None
+    start, end = block[1].split("-->")
+    speaker, _, text = " ".join(block[2:]).partition(": ")
+    if not text:
+        speaker, text = "", speaker
+    return srt_time_to_ms(start), srt_time_to_ms(end), speaker, text.strip()
+
+
+def iter_srt(path: str) -> Iterator[Segment]:
+    """Сегменты (start_ms, end_ms, speaker, text) из .srt от diarize.py, где у текста префикс "Speaker N: ".
+
+    Файл читается построчно, целиком в память не загружается.
+    """
+    with open(path, "r", encoding="utf-8-sig") as f:
+        block = []
+        for line in f:
+            line = line.strip()
+            if line:
+                block.append(line)
+                continue
+            if segment := _parse_srt_block(block):
+                yield segment
+            block = []
+        if segment := _parse_srt_block(block):
+            yield segment
+
+
+def read_srt(path: str) -> list[dict]:
+    return [{"start_time": start, "end_time": end, "speaker": speaker, "text": text}
+            for start, end, speaker, text in iter_srt(path)]
+
+
+def write_srt(segments: Iterable[Segment], path: str):
+    with open(path, "w", encoding="utf-8-sig") as f:
+        for i, (start, end, speaker, text) in enumerate(segments, start=1):
+            f.write(f"{i}\n{ms_to_srt_time(start)} --> {ms_to_srt_time(end)}\n{speaker}: {text}\n\n")
+
+
+def structured_path(txt_path: str) -> str:
+    """Путь к .trs рядом с .txt транскрипта."""
+    return os.path.splitext(txt_path)[0] + ".trs"
+
+
+class Transcript:
+    """Сегменты транскрипта в колонках: времена, спикеры и смещения текста — массивы array, текст — один utf-8 блок.
+
+    Файл .trs: сигнатура, заголовок, имена спикеров в JSON и колонки подряд;
+    читается одним read без разбора текста.
+    """
+    MAGIC = b"TRS1"
+    HEADER = struct.Struct("<4sIII")
+
+    __slots__ = ("starts", "ends", "speaker_ids", "speakers", "offsets", "blob")
+
+    def __init__(self):
+        self.starts = array("I")
+        self.ends = array("I")
+        self.speaker_ids = array("H")
+        self.speakers: list[str] = []
+        self.offsets = array("I", [0])
+        self.blob = bytearray()
+
+    def __len__(self):
+        return len(self.starts)
+
+    def append(self, start_ms: int, end_ms: int, speaker: str, text: str):
+        try:
+            speaker_id = self.speakers.index(speaker)
+        except ValueError:
+            speaker_id = len(self.speakers)
+            self.speakers.append(speaker)
+        self.starts.append(start_ms)
+        self.ends.append(end_ms)
+        self.speaker_ids.append(speaker_id)
+        self.blob += text.encode("utf-8")
+        self.offsets.append(len(self.blob))
+
+    def text(self, index: int) -> str:
+        return self.blob[self.offsets[index]:self.offsets[index + 1]].decode("utf-8")
+
+    def __iter__(self) -> Iterator[Segment]:
+        for i in range(len(self)):
+            yield self.starts[i], self.ends[i], self.speakers[self.speaker_ids[i]], self.text(i)
+
+    def turns(self) -> Iterator[Tuple[str, str]]:
+        """Подряд идущие сегменты одного спикера склеены в реплику, как в .txt от diarize.py."""
+        speaker_id, parts = None, []
+        for i in range(len(self)):
+            if self.speaker_ids[i] != speaker_id and parts:
+                yield self.speakers[speaker_id], " ".join(parts)
+                parts = []
+            speaker_id = self.speaker_ids[i]
+            parts.append(self.text(i))
+        if parts:
+            yield self.speakers[speaker_id], " ".join(parts)
+
+    @classmethod
+    def from_segments(cls, segments: Iterable[Segment]) -> "Transcript":
+        transcript = cls()
+        for start_ms, end_ms, speaker, text in segments:
+            transcript.append(start_ms, end_ms, speaker, text)
+        return transcript
+
+    @classmethod
+    def from_srt(cls, path: str) -> "Transcript":
+        return cls.from_segments(iter_srt(path))
+
+    def write(self, path: str):
+        speakers = json.dumps(self.speakers, ensure_ascii=False).encode("utf-8")
+        columns = [self.starts, self.ends, self.speaker_ids, self.offsets]
+        if sys.byteorder != "little":
+            columns = [array(column.typecode, column) for column in columns]
+            for column in columns:
+                column.byteswap()
+        with open(path, "wb") as f:
+            f.write(self.HEADER.pack(self.MAGIC, len(self), len(speakers), len(self.blob)))
+            f.write(speakers)
+            for column in columns:
+                column.tofile(f)
+            f.write(self.blob)
+
+    @classmethod
+    def read(cls, path: str) -> "Transcript":
+        with open(path, "rb") as f:
+            data = memoryview(f.read())
+        magic, count, speakers_size, blob_size = cls.HEADER.unpack_from(data)
+        if magic != cls.MAGIC:
+            raise ValueError(f"{path}: не файл транскрипта")
+        transcript = cls()
+        position = cls.HEADER.size
+        transcript.speakers = json.loads(bytes(data[position:position + speakers_size]))
+        position += speakers_size
+        for column, length in ((transcript.starts, count), (transcript.ends, count),
+                               (transcript.speaker_ids, count), (transcript.offsets, count + 1)):
+            del column[:]
+            size = length * column.itemsize
+            column.frombytes(data[position:position + size])
+            if sys.byteorder != "little":
+                column.byteswap()
+            position += size
+        transcript.blob = bytearray(data[position:position + blob_size])
+        return transcript
+
+    def to_srt(self, path: str):
+        write_srt(self, path)
+
+    def to_vtt(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("WEBVTT\n\n")
+            for start, end, speaker, text in self:
+                f.write(f"{ms_to_srt_time(start, '.')} --> {ms_to_srt_time(end, '.')}\n<v {speaker}>{text}\n\n")
@@ -1,12 +1,19 @@
-import random
-import string
-from typing import List, Optional
+import hashlib
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Callable, List, Optional
 import chromadb
 import ollama
 from yandex_cloud_ml_sdk import YCloudML
 
-from src.domain.interfaces import IAIService
+from src.domain.interfaces import IAIService, ICompletionCache
 from src.domain.constants import LLMPrompts
+from src.domain.transcript import Transcript, structured_path
+from src.infrastructure.LLM.rate_limiting import RemoteCallPolicy
+from src.infrastructure.LLM.text_chunker import estimate_tokens, pack_lines, split_text_by_tokens
 
 class AIService(IAIService):
     def __init__(
@@ -15,41 +22,140 @@ class AIService(IAIService):
 	    folder_id: str,
         embedding_model: str = "mxbai-embed-large",
         generation_model: str = "deepseek-r1:8b",
+        map_concurrency: int = 4,
+        requests_per_second: float = 5,
+        retries: int = 3,
+        reduce_group_size: int = 8,
+        completion_cache: Optional[ICompletionCache] = None,
+        chunk_tokens: int = 3000,
+        embedding_batch_size: int = 64,
+        embedding_concurrency: int = 2,
+        passage_tokens: int = 200,
+        index_dir: Optional[str] = None,
+        index_max_passages: int = 0,
+        top_k: int = 4,
+        tokens_per_minute: float = 0,
+        circuit_failures: int = 5,
+        circuit_reset: float = 60,
     ):
-        self.client = chromadb.Client()
+        self.client = chromadb.PersistentClient(path=index_dir) if index_dir else chromadb.Client()
+        # index_lock охраняет только словарь замков и вытеснение; сборка идёт под замком своей коллекции
+        self.index_lock = threading.Lock()
+        self.collection_locks = {}
+        self.index_max_passages = index_max_passages
+        self.top_k = top_k
         self.embedding_model = embedding_model
         self.generation_model = generation_model
         self.sdk = YCloudML(folder_id=folder_id, auth=auth)
-        self.WORDS_PER_CHUNK = 1500
+        self.chunk_tokens = chunk_tokens
+        self.embedding_batch_size = max(1, embedding_batch_size)
+        self.embedding_executor = ThreadPoolExecutor(max_workers=max(1, embedding_concurrency))
+        self.passage_tokens = passage_tokens
+        self.map_executor = ThreadPoolExecutor(max_workers=max(1, map_concurrency))
+        self.remote_policy = RemoteCallPolicy(requests_per_second, tokens_per_minute, retries,
+                                              circuit_failures, circuit_reset)
+        self.reduce_group_size = max(2, reduce_group_size)
+        self.REMOTE_MODEL = "yandexgpt"
+        self.TEMPERATURE = 0.5
+        self.completion_cache = completion_cache
 
     def make_embedding_collection(self, file_path: str) -> str:
-        """Читает текстовый файл и создает коллекцию эмбеддингов в ChromaDB."""
+        """Возвращает коллекцию эмбеддингов для файла; строит её только если такого содержимого ещё не было."""
         try:
-            with open(file_path, "r", encoding="utf-8") as file:
-                lines = [line.strip() for line in file if line.strip()]
+            with open(file_path, "rb") as file:
+                content = file.read()
         except FileNotFoundError:
             raise ValueError(f"File not found: {file_path}")
 
-        collection_name = "".join(random.choice(string.ascii_lowercase) for _ in range(10))
-        collection = self.client.create_collection(name=collection_name)
+        digest = hashlib.blake2b(content, digest_size=16)
+        digest.update(f"{self.embedding_model}:{self.passage_tokens}".encode())
+        collection_name = f"t{digest.hexdigest()}"
 
-        for i, text in enumerate(lines):
-            try:
-                response = ollama.embeddings(model=self.embedding_model, prompt=text)
+        with self._collection_lock(collection_name):
+            collection = self._get_collection(collection_name)
+            if collection is not None and collection.metadata.get("complete"):
+                self._touch(collection)
+                print(f"🔹 Индекс {collection_name} уже построен")
+                return collection_name
+            if collection is not None:
+                # сборку прервали на середине
+                self.client.delete_collection(collection_name)
+
+            lines = [line.strip() for line in content.decode("utf-8").splitlines() if line.strip()]
+            passages = pack_lines(lines, self.passage_tokens)
+            collection = self.client.create_collection(name=collection_name,
+                                                       metadata={"complete": False, "last_used": time.time(),
+                                                                 "passages": len(passages)})
+
+            batches = [(start, passages[start:start + self.embedding_batch_size])
+                       for start in range(0, len(passages), self.embedding_batch_size)]
+            failed = []
+            for start, batch, embeddings in self.embedding_executor.map(self._embed_batch, batches):
+                if embeddings is None:
+                    failed.append(f"{start}-{start + len(batch) - 1}")
+                    continue
                 collection.add(
-                    ids=[str(i)],
-                    embeddings=[response["embedding"]],
-                    documents=[text]
+                    ids=[str(i) for i in range(start, start + len(batch))],
+                    embeddings=embeddings,
+                    documents=batch
                 )
-            except Exception as e:
-                print(f"Error processing line {i}: {e}")
+            print(f"🔹 {len(lines)} строк -> {len(passages)} пассажей, {len(batches)} запросов эмбеддингов")
+            if failed:
+                # неполный индекс дал бы ответы без части текста, а флаг complete закрепил бы его навсегда
+                self.client.delete_collection(collection_name)
+                raise RuntimeError(f"Не удалось получить эмбеддинги пассажей {', '.join(failed)}")
+            collection.modify(metadata={"complete": True, "last_used": time.time(), "passages": len(passages)})
+        self._evict_indexes(keep=collection_name)
         return collection_name
 
+    def _collection_lock(self, name: str) -> threading.Lock:
+        with self.index_lock:
+            return self.collection_locks.setdefault(name, threading.Lock())
+
+    def _get_collection(self, name):
+        try:
+            return self.client.get_collection(name=name)
+        except Exception:
+            return None
+
+    def _touch(self, collection):
+        collection.modify(metadata={**collection.metadata, "last_used": time.time()})
+
+    def _evict_indexes(self, keep: str):
+        """LRU по last_used, пока суммарное число пассажей во всех индексах больше index_max_passages."""
+        if not self.index_max_passages:
+            return
+        with self.index_lock:
+            collections = []
+            for item in self.client.list_collections():
+                collection = self._get_collection(getattr(item, "name", item))
+                if collection is not None:
+                    collections.append(collection)
+            total = sum(c.metadata.get("passages", 0) for c in collections)
+            for collection in sorted(collections, key=lambda c: c.metadata.get("last_used", 0)):
+                if total <= self.index_max_passages:
+                    break
+                # недостроенный индекс сейчас собирает другой поток
+                if collection.name == keep or not collection.metadata.get("complete"):
+                    continue
+                self.client.delete_collection(collection.name)
+                total -= collection.metadata.get("passages", 0)
+
+    def _embed_batch(self, indexed_batch):
+        start, batch = indexed_batch
+        try:
+            response = ollama.embed(model=self.embedding_model, input=batch)
+            return start, batch, response["embeddings"]
+        except Exception as e:
+            print(f"Error processing passages {start}-{start + len(batch) - 1}: {e}")
+            return start, batch, None
+
     def generate_answer(self, prompt: str, collection_name: str) -> str:
         """Генерирует ответ на основе промпта и данных из коллекции."""
         collection = self.client.get_collection(name=collection_name)
         if not collection:
             raise ValueError("Collection not initialized. Call prepare_text_for_embedding() first.")
+        self._touch(collection)
 
         try:
             # Поиск релевантного текста
@@ -59,9 +165,9 @@ class AIService(IAIService):
             )
             results = collection.query(
                 query_embeddings=[embedding_response["embedding"]],
-                n_results=1
+                n_results=self.top_k
             )
-            context = results['documents'][0][0]
+            context = "\n\n".join(results['documents'][0])
 
             # Генерация ответа
             generation_response = ollama.generate(
@@ -74,69 +180,143 @@ class AIService(IAIService):
             raise RuntimeError(f"Error generating answer: {e}")
 
     def generate_remote_api_answer(self, file_path, prompt):
-        with open(file_path, "r", encoding="utf-8") as f:
-            text = f.read()
+        return self.generate_remote_api_answers(file_path, [prompt])[prompt]
 
+    def generate_remote_api_answers(self, file_path, prompts: list[str],
+                                    on_progress: Optional[Callable[[Optional[str], str], None]] = None) -> dict[str, str]:
+        """Сжимает части транскрипта один раз и по ним собирает итоговый ответ для каждого промпта.
+
+        on_progress(None, status) сообщает о ходе map/reduce, on_progress(prompt, text) —
+        текущий текст ответа на prompt по мере генерации. Вызывается из рабочих потоков.
+        """
         print("📄 Разделение на части...")
-        chunks = self.split_text_by_paragraphs(text)
+        chunks = self.split_transcript(file_path)
         print(f"🔹 Найдено частей: {len(chunks)}")
 
-        summaries = []
-        for i, chunk in enumerate(chunks):
+        summaries = self.summarize_chunks(chunks, LLMPrompts.CONDENSE_CHUNK, on_progress)
+        summaries = self.reduce_tree(summaries, on_progress)
+
+        print("🧩 Объединение частичных summary в итоговое...")
+        prompts = list(dict.fromkeys(prompts))
+        # отдельный пул: reduce не должен ждать свободного потока в map_executor
+        with ThreadPoolExecutor(max_workers=len(prompts)) as executor:
+            answers = executor.map(
+                lambda prompt: self.summarize_all(self.sdk, summaries, prompt,
+                                                  on_text=partial(on_progress, prompt) if on_progress else None),
+                prompts)
+            results = dict(zip(prompts, answers))
+
+        print(f"\n✅ Готово. YandexGPT: {self.remote_policy.stats()}")
+        return results
+
+    def summarize_chunks(self, chunks: list[str], prompt, on_progress=None) -> list[str]:
+        """Map-стадия: части обрабатываются параллельно, порядок результатов совпадает с порядком частей."""
+        done = 0
+        lock = threading.Lock()
+
+        def summarize(indexed_chunk):
+            nonlocal done
+            i, chunk = indexed_chunk
             print(f"🧠 Обработка части {i+1}/{len(chunks)}...")
             summary = self.summarize_chunk(self.sdk, chunk, prompt)
-            summaries.append(summary)
+            with lock:
+                done += 1
+                if on_progress:
+                    on_progress(None, f"Обработано частей: {done}/{len(chunks)}")
+            return summary
 
-        print("🧩 Объединение частичных summary в итоговое...")
-        final_summary = self.summarize_all(self.sdk, summaries, prompt)
+        return list(self.map_executor.map(summarize, enumerate(chunks)))
 
-        print("\n✅ Готово. Итоговое краткое содержание:")
-        print("-" * 50)
-        print(final_summary)
-        return final_summary 
+    def reduce_tree(self, summaries: list[str], on_progress=None) -> list[str]:
+        """Сводит части группами по reduce_group_size, уровень за уровнем, пока их не останется на один промпт.
 
+        Группы одного уровня сжимаются параллельно; соседние части остаются соседними,
+        так что порядок изложения сохраняется.
+        """
+        level = 0
+        while len(summaries) > self.reduce_group_size:
+            level += 1
+            groups = [summaries[i:i + self.reduce_group_size]
+                      for i in range(0, len(summaries), self.reduce_group_size)]
+            print(f"🌲 Уровень {level}: {len(summaries)} частей -> {len(groups)}")
+            if on_progress:
+                on_progress(None, f"Объединяю части: {len(summaries)} -> {len(groups)}")
+            summaries = list(self.map_executor.map(
+                lambda group: group[0] if len(group) == 1 else self.merge_summaries(self.sdk, group),
+                groups))
+        return summaries
 
+    def complete(self, sdk: YCloudML, messages: list[dict], on_text: Optional[Callable[[str], None]] = None) -> str:
+        """Запрос к YandexGPT через кэш ответов; при промахе — с ограничением частоты и повторами.
 
+        С on_text ответ запрашивается потоком, и on_text получает весь накопленный текст после каждой порции.
+        """
+        key = None
+        if self.completion_cache:
+            key = self.completion_cache.make_key(self.REMOTE_MODEL, self.TEMPERATURE, messages)
+            cached = self.completion_cache.get(key)
+            if cached is not None:
+                if on_text:
+                    on_text(cached)
+                return cached
+        model = sdk.models.completions(self.REMOTE_MODEL).configure(temperature=self.TEMPERATURE)
+        prompt_tokens = sum(estimate_tokens(message["text"]) for message in messages)
+        if on_text:
+            text = self.remote_policy.call(self._run_stream, model, messages, on_text, tokens=prompt_tokens)
+        else:
+            text = self.remote_policy.call(model.run, messages, tokens=prompt_tokens).alternatives[0].text
+        self.remote_policy.charge_tokens(estimate_tokens(text))
+        print(text)
+        if key:
+            self.completion_cache.put(key, text)
+        return text
+
+    @staticmethod
+    def _run_stream(model, messages, on_text) -> str:
+        text = ""
+        for result in model.run_stream(messages):
+            text = result.alternatives[0].text
+            on_text(text)
+        return text
 
     def cleanup(self, collection_name) -> None:
         """Удаляет коллекцию ChromaDB и освобождает ресурсы."""
         self.client.delete_collection(collection_name)
 
-    def split_text_by_paragraphs(self, text: str) -> list[str]:
-        paragraphs = text.split("\n\n")
-        chunks = []
-        current = []
-
-        word_count = 0
-        for para in paragraphs:
-            words = para.split()
-            if word_count + len(words) > self.WORDS_PER_CHUNK and current:
-                chunks.append("\n\n".join(current))
-                current = [para]
-                word_count = len(words)
-            else:
-                current.append(para)
-                word_count += len(words)
-
-        if current:
-            chunks.append("\n\n".join(current))
-
-        return chunks
+    def split_text(self, text: str) -> list[str]:
+        return split_text_by_tokens(text, self.chunk_tokens)
 
+    def split_transcript(self, file_path: str) -> list[str]:
+        """Части по репликам из .trs, если он есть, иначе разбор плоского текста."""
+        trs_path = structured_path(file_path)
+        if os.path.exists(trs_path):
+            turns = [f"{speaker}: {text}" if speaker else text
+                     for speaker, text in Transcript.read(trs_path).turns()]
+            return pack_lines(turns, self.chunk_tokens)
+        with open(file_path, "r", encoding="utf-8") as f:
+            return self.split_text(f.read())
 
     def summarize_chunk(self, sdk: YCloudML, chunk: str, prompt) -> str:
         messages = [
             {"role": "system", "text": "Ты — помощник, для работы с текстом."},
             {"role": "user", "text": f"{prompt}:\n\n{chunk}"}
         ]
-        result = (
-            sdk.models.completions("yandexgpt").configure(temperature=0.5).run(messages)
-        )
-        print(result.alternatives[0].text)
-        return result.alternatives[0].text
+        return self.complete(sdk, messages)
+
 
+    def merge_summaries(self, sdk: YCloudML, partial_summaries: list[str]) -> str:
+        merged = "\n\n".join(partial_summaries)
+        messages = [
+            {"role": "system", "text": "Ты — помощник, объединяющий краткие содержания соседних частей текста."},
+            {"role": "user", "text": (
+                "Вот краткие содержания идущих подряд частей большого текста:\n\n"
+                f"{merged}\n\n"
+                "Объедини их в одно сжатое содержание, сохранив порядок, ключевые факты, имена, цифры и выводы."
+            )}
+        ]
+        return self.complete(sdk, messages)
 
-    def summarize_all(self, sdk: YCloudML, partial_summaries: list[str], prompt) -> str:
+    def summarize_all(self, sdk: YCloudML, partial_summaries: list[str], prompt, on_text=None) -> str:
         merged = "\n\n".join(partial_summaries)
         if prompt == LLMPrompts.MAKE_POST:
             messages = [
@@ -156,9 +336,5 @@ class AIService(IAIService):
                     "Составь единое, связное и краткое итоговое содержание текста, избегая повторов и несостыковок."
                 )}
             ]
-        result = (
-            sdk.models.completions("yandexgpt").configure(temperature=0.5).run(messages)
-        )
-        print(result.alternatives[0].text)
-        return result.alternatives[0].text
+        return self.complete(sdk, messages, on_text)
     
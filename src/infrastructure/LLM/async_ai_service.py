@@ -0,0 +1,29 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from src.domain.interfaces import IAIService, IAsyncAIService
+
+
+class AsyncAIService(IAsyncAIService):
+    """Выполняет запросы синхронного IAIService в отдельном пуле, чтобы бот не замирал на время генерации.
+
+    Пул свой, а не общий asyncio.to_thread: долгие суммаризации не занимают потоки,
+    нужные транскрибации и работе с файлами.
+    """
+
+    def __init__(self, ai_service: IAIService, max_concurrency: int = 2):
+        self.ai_service = ai_service
+        self.executor = ThreadPoolExecutor(max_workers=max(1, max_concurrency), thread_name_prefix="llm")
+
+    async def generate_remote_api_answer(self, file_path: str, prompt: str) -> str:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.ai_service.generate_remote_api_answer,
+                                          file_path, prompt)
+
+    async def generate_remote_api_answers(self, file_path: str, prompts: List[str],
+                                          on_progress: Optional[Callable[[Optional[str], str], None]] = None
+                                          ) -> Dict[str, str]:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.ai_service.generate_remote_api_answers,
+                                          file_path, prompts, on_progress)
@@ -0,0 +1,71 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+from src.domain.interfaces import ICompletionCache
+from src.infrastructure.disk_lru import DiskLRU
+
+
+class DiskCompletionCache(ICompletionCache):
+    """Ответы YandexGPT по хэшу модели, температуры и сообщений (включая текст части).
+
+    Записи старше ttl секунд считаются промахом; при превышении max_bytes
+    вытесняются давно не читавшиеся (LRU, размер учитывается в памяти).
+    """
+
+    def __init__(self, directory: str, max_bytes: int, ttl: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+        self.lru = DiskLRU(self.directory, max_bytes, (".json",))
+
+    def make_key(self, model, temperature, messages):
+        payload = json.dumps({"model": model, "temperature": temperature, "messages": messages},
+                             sort_keys=True, ensure_ascii=False)
+        return hashlib.blake2b(payload.encode(), digest_size=20).hexdigest()
+
+    def _path(self, key):
+        return self.lru.path(key, ".json")
+
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def get(self, key):
+        path = self._path(key)
+        text = None
+        with self.lock:
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    record = json.load(f)
+                if time.time() - record["created_at"] > self.ttl:
+                    self.lru.remove(key)
+                else:
+                    text = record["text"]
+                    os.utime(path)
+                    self.lru.touch(key)
+            except (FileNotFoundError, ValueError, KeyError):
+                pass
+            if text is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        logging.info(f"Кэш LLM: {'попадание' if text is not None else 'промах'} {key[:12]} "
+                     f"(hits={self.hits}, misses={self.misses}, hit_rate={self.hit_rate():.0%})")
+        return text
+
+    def put(self, key, text):
+        with self.lock:
+            tmp_path = self._path(key) + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"created_at": time.time(), "text": text}, f, ensure_ascii=False)
+            size = os.path.getsize(tmp_path)
+            os.replace(tmp_path, self._path(key))
+            self.lru.add(key, size)
@@ -0,0 +1,181 @@
+import logging
+import random
+import threading
+import time
+
+
+class CircuitOpenError(RuntimeError):
+    """Удалённая модель недавно падала подряд; запрос отклонён без обращения к ней."""
+
+
+# Временные сбои: HTTP-статусы и коды gRPC, после которых повтор имеет смысл
+TRANSIENT_HTTP_STATUSES = {408, 429}
+TRANSIENT_GRPC_CODES = {"UNAVAILABLE", "DEADLINE_EXCEEDED", "RESOURCE_EXHAUSTED", "INTERNAL", "ABORTED"}
+# Сетевые ошибки httpx/requests не наследуют встроенные TimeoutError/ConnectionError
+TRANSIENT_ERROR_TYPES = {"TimeoutException", "NetworkError", "Timeout", "ConnectionError"}
+
+
+def is_transient_error(error: BaseException) -> bool:
+    """True для таймаутов, обрывов соединения, 429 и 5xx; остальные ошибки повторять бессмысленно."""
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    if any(cls.__name__ in TRANSIENT_ERROR_TYPES for cls in type(error).__mro__):
+        return True
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    if isinstance(status, int):
+        return status in TRANSIENT_HTTP_STATUSES or 500 <= status < 600
+    code = getattr(error, "code", None)
+    if callable(code):
+        try:
+            code = code()
+        except Exception:
+            return False
+    return getattr(code, "name", None) in TRANSIENT_GRPC_CODES
+
+
+class TokenBucket:
+    """Ведро на capacity единиц, пополняемое со скоростью rate единиц в секунду; общее для всех потоков."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, amount: float = 1) -> float:
+        """Ждёт, пока в ведре наберётся amount (но не больше capacity), и списывает; возвращает время ожидания."""
+        if self.rate <= 0:
+            return 0.0
+        need = min(amount, self.capacity)
+        waited = 0.0
+        while True:
+            with self.lock:
+                self._refill(time.monotonic())
+                if self.tokens >= need:
+                    self.tokens -= amount
+                    return waited
+                wait = (need - self.tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
+
+    def charge(self, amount: float):
+        """Списывает без ожидания, ведро может уйти в минус: так учитываются токены ответа, известные только после вызова."""
+        if self.rate <= 0:
+            return
+        with self.lock:
+            self._refill(time.monotonic())
+            self.tokens -= amount
+
+
+class CircuitBreaker:
+    """После failure_threshold ошибок подряд отклоняет вызовы reset_timeout секунд, затем пропускает один пробный."""
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_progress = False
+        self.lock = threading.Lock()
+
+    def before_call(self):
+        with self.lock:
+            if self.opened_at is None:
+                return
+            if time.monotonic() - self.opened_at < self.reset_timeout or self.trial_in_progress:
+                raise CircuitOpenError("YandexGPT временно недоступен, запросы приостановлены")
+            self.trial_in_progress = True
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_in_progress = False
+
+    def record_ignored(self):
+        """Ошибка не говорит о недоступности модели: счётчик не меняется, пробный вызов освобождается."""
+        with self.lock:
+            self.trial_in_progress = False
+
+    def record_failure(self) -> bool:
+        """True, если после этой ошибки цепь разомкнулась."""
+        with self.lock:
+            self.failures += 1
+            self.trial_in_progress = False
+            if self.failure_threshold and self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+                return True
+            return False
+
+
+class RemoteCallPolicy:
+    """Общие для всех удалённых вызовов AIService лимиты (запросы/с и токены/мин), повторы и предохранитель."""
+
+    def __init__(self, requests_per_second: float, tokens_per_minute: float, retries: int,
+                 failure_threshold: int = 5, reset_timeout: float = 60,
+                 base_delay: float = 1, max_delay: float = 30):
+        self.requests = TokenBucket(requests_per_second, max(1.0, requests_per_second))
+        self.tokens = TokenBucket(tokens_per_minute / 60, tokens_per_minute)
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.retries = retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.lock = threading.Lock()
+        self.metrics = {"calls": 0, "retries": 0, "failures": 0, "non_transient": 0, "rejected": 0,
+                        "circuit_opened": 0, "throttled_seconds": 0.0, "backoff_seconds": 0.0}
+
+    def _count(self, name, value=1):
+        with self.lock:
+            self.metrics[name] += value
+
+    def call(self, func, *args, tokens: int = 0):
+        """func(*args) с ожиданием квот и повторами временных сбоев с экспоненциальной задержкой и полным джиттером.
+
+        tokens — оценка токенов запроса; токены ответа вызывающий списывает отдельно через charge_tokens.
+        """
+        for attempt in range(self.retries + 1):
+            try:
+                self.breaker.before_call()
+            except CircuitOpenError:
+                self._count("rejected")
+                raise
+            throttled = self.requests.acquire() + self.tokens.acquire(tokens)
+            self._count("throttled_seconds", throttled)
+            self._count("calls")
+            try:
+                result = func(*args)
+            except Exception as e:
+                if not is_transient_error(e):
+                    self._count("non_transient")
+                    self.breaker.record_ignored()
+                    raise
+                self._count("failures")
+                if self.breaker.record_failure():
+                    self._count("circuit_opened")
+                    logging.error(f"YandexGPT: {self.breaker.failures} ошибок подряд, "
+                                  f"запросы приостановлены на {self.breaker.reset_timeout} c")
+                if attempt == self.retries:
+                    raise
+                delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+                self._count("retries")
+                self._count("backoff_seconds", delay)
+                logging.warning(f"Ошибка запроса ({e}), повтор через {delay:.1f} c")
+                time.sleep(delay)
+            else:
+                self.breaker.record_success()
+                return result
+
+    def charge_tokens(self, tokens: int):
+        self.tokens.charge(tokens)
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {key: round(value, 2) if isinstance(value, float) else value
+                    for key, value in self.metrics.items()}
@@ -0,0 +1,77 @@
+import re
+
+TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+SPEAKER_TURN = re.compile(r"\n(?=[^\n:]{1,40}: )")
+SENTENCE_END = re.compile(r"(?<=[.!?…])\s+")
+
+
+def estimate_tokens(text: str) -> int:
+    """Грубая оценка числа токенов без токенизатора: слово ~ 1 токен плюс по токену на каждые 6 символов сверх того."""
+    return sum(1 + len(piece) // 6 for piece in TOKEN_PATTERN.findall(text))
+
+
+def _split_oversized(text: str, budget: int) -> list[tuple[str, str]]:
+    """Части текста не длиннее budget вместе с разделителем, которым их склеивать обратно.
+
+    Сначала абзацы, затем реплики спикеров, затем предложения и, в крайнем случае, слова.
+    """
+    for separator, pattern in (("\n\n", re.compile(r"\n\s*\n")), ("\n", SPEAKER_TURN), (" ", SENTENCE_END)):
+        parts = [part.strip() for part in pattern.split(text) if part.strip()]
+        if len(parts) > 1:
+            units = []
+            for part in parts:
+                if estimate_tokens(part) > budget:
+                    units.extend(_split_oversized(part, budget))
+                else:
+                    units.append((part, separator))
+            return units
+    units = []
+    current = []
+    current_tokens = 0
+    for word in text.split():
+        tokens = estimate_tokens(word)
+        if current and current_tokens + tokens > budget:
+            units.append((" ".join(current), " "))
+            current, current_tokens = [], 0
+        current.append(word)
+        current_tokens += tokens
+    if current:
+        units.append((" ".join(current), " "))
+    return units
+
+
+def split_text_by_tokens(text: str, budget: int) -> list[str]:
+    """Жадно набивает части до budget токенов, режа по самым крупным доступным границам."""
+    if estimate_tokens(text) <= budget:
+        return [text.strip()] if text.strip() else []
+    chunks = []
+    current = ""
+    current_tokens = 0
+    for unit, separator in _split_oversized(text, budget):
+        tokens = estimate_tokens(unit)
+        if current and current_tokens + tokens > budget:
+            chunks.append(current)
+            current, current_tokens = "", 0
+        current = f"{current}{separator}{unit}" if current else unit
+        current_tokens += tokens
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def pack_lines(lines: list[str], budget: int) -> list[str]:
+    """Склеивает подряд идущие короткие строки в пассажи до budget токенов; длинные строки режет."""
+    passages = []
+    current = []
+    current_tokens = 0
+    for line in lines:
+        for part in split_text_by_tokens(line, budget):
+            tokens = estimate_tokens(part)
+            if current and current_tokens + tokens > budget:
+                passages.append("\n".join(current))
+                current, current_tokens = [], 0
+            current.append(part)
+            current_tokens += tokens
+    if current:
+        passages.append("\n".join(current))
+    return passages
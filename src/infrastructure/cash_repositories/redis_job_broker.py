@@ -0,0 +1,35 @@
+import json
+import redis.asyncio as redis
+from .redis_connection import pool
+from src.domain.interfaces import IJobBroker
+
+class RedisJobBroker(IJobBroker):
+    JOBS_KEY = "queue:dispatch"
+    RESULTS_KEY = "queue:results"
+
+    def __init__(self):
+        self.r = redis.Redis(connection_pool=pool)
+
+    async def publish_job(self, record):
+        await self.r.rpush(self.JOBS_KEY, json.dumps(record))
+
+    async def consume_job(self, timeout=5):
+        res = await self.r.blpop(self.JOBS_KEY, timeout=timeout)
+        if res:
+            return json.loads(res[1])
+        return None
+
+    async def is_queued(self, job_id):
+        for record in await self.r.lrange(self.JOBS_KEY, 0, -1):
+            if json.loads(record).get("job_id") == job_id:
+                return True
+        return False
+
+    async def publish_result(self, result):
+        await self.r.rpush(self.RESULTS_KEY, json.dumps(result))
+
+    async def consume_result(self, timeout=5):
+        res = await self.r.blpop(self.RESULTS_KEY, timeout=timeout)
+        if res:
+            return json.loads(res[1])
+        return None
@@ -0,0 +1,50 @@
+import json
+import time
+import redis.asyncio as redis
+from .redis_connection import pool
+from src.domain.interfaces import IJobStore
+
+class RedisJobStore(IJobStore):
+    JOBS_KEY = "queue:jobs"
+    IN_FLIGHT_KEY = "queue:in_flight"
+    # время первой постановки хранится отдельно: save() при обновлении задачи его не сбрасывает
+    ENQUEUED_KEY = "queue:enqueued_at"
+
+    def __init__(self):
+        self.r = redis.Redis(connection_pool=pool)
+
+    async def save(self, job_id, record):
+        async with self.r.pipeline(transaction=True) as pipe:
+            pipe.hsetnx(self.ENQUEUED_KEY, job_id, time.time())
+            pipe.hset(self.JOBS_KEY, job_id, json.dumps(record))
+            await pipe.execute()
+
+    async def load(self, job_id):
+        record = await self.r.hget(self.JOBS_KEY, job_id)
+        if record:
+            return json.loads(record)
+        return None
+
+    async def load_all(self):
+        """Задачи в порядке первой постановки в очередь."""
+        jobs = await self.r.hgetall(self.JOBS_KEY)
+        enqueued = await self.r.hgetall(self.ENQUEUED_KEY)
+        order = sorted(jobs, key=lambda job_id: float(enqueued.get(job_id, 0)))
+        return [json.loads(jobs[job_id]) for job_id in order]
+
+    async def mark_in_flight(self, job_id, timeout):
+        await self.r.zadd(self.IN_FLIGHT_KEY, {job_id: time.time() + timeout})
+
+    async def get_expired(self):
+        expired = await self.r.zrangebyscore(self.IN_FLIGHT_KEY, 0, time.time())
+        return [job_id.decode() for job_id in expired]
+
+    async def release(self, job_id):
+        await self.r.zrem(self.IN_FLIGHT_KEY, job_id)
+
+    async def ack(self, job_id):
+        async with self.r.pipeline(transaction=True) as pipe:
+            pipe.hdel(self.JOBS_KEY, job_id)
+            pipe.hdel(self.ENQUEUED_KEY, job_id)
+            pipe.zrem(self.IN_FLIGHT_KEY, job_id)
+            await pipe.execute()
@@ -3,16 +3,10 @@ import subprocess
 import ffmpeg
 import re
 import shutil, random, string
-from src.domain.constants import ResultExtensions
-from docx import Document
-from reportlab.lib.pagesizes import A4
-from reportlab.pdfgen import canvas
-from textwrap import wrap
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
 import logging, requests
 
 from src.domain.interfaces import IFileService, ILinkService
+from src.infrastructure.render_service import render
 
 class FileService(IFileService):
 
@@ -76,81 +70,9 @@ class FileService(IFileService):
         os.makedirs(new_path, exist_ok=True)
         return new_path
 
-    @classmethod
-    def _txt_to_pdf(cls, txt_file_path, pdf_file_path):
-        from reportlab.lib.pagesizes import A4
-        from reportlab.pdfgen import canvas
-        from reportlab.pdfbase import pdfmetrics
-        from reportlab.pdfbase.ttfonts import TTFont
-        from textwrap import wrap
-        import os
-
-        CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
-        FONT_PATH = os.path.join(CURRENT_DIR, "DejaVuSans.ttf")
-        pdfmetrics.registerFont(TTFont("DejaVu", FONT_PATH))
-
-        page_width, page_height = A4
-        margin = 40
-        line_height = 14
-        font_name = "DejaVu"  # ← используем правильный шрифт
-        font_size = 10
-        max_lines_per_page = int((page_height - 2 * margin) / line_height)
-
-        c = canvas.Canvas(pdf_file_path, pagesize=A4)
-        c.setFont(font_name, font_size)
-
-        max_line_width = page_width - 2 * margin
-        avg_char_width = c.stringWidth("M", font_name, font_size)
-        max_chars_per_line = int(max_line_width / avg_char_width)
-
-        with open(txt_file_path, "r", encoding="utf-8-sig") as file:
-            lines = file.readlines()
-
-        y = page_height - margin
-        line_count = 0
-
-        for line in lines:
-            wrapped_lines = wrap(line.strip(), width=max_chars_per_line)
-
-            for wrapped_line in wrapped_lines:
-                if line_count >= max_lines_per_page:
-                    c.showPage()
-                    c.setFont(font_name, font_size)
-                    y = page_height - margin
-                    line_count = 0
-
-                c.drawString(margin, y, wrapped_line)
-                y -= line_height
-                line_count += 1
-
-        c.save()
-
-
-    @classmethod
-    def _txt_to_docx(cls, txt_file_path, docx_file_path):
-        doc = Document()
-                
-        with open(txt_file_path, 'r', encoding='utf-8') as txt_file:
-            lines = txt_file.readlines()
-                
-        for line in lines:
-            doc.add_paragraph(line.strip())
-        doc.save(docx_file_path)
-
     @classmethod
     def convert_txt_to_ext(cls, txt_path, ext):
-        result = f"{os.path.splitext(txt_path)[0]}.{ext}"
-    
-        converters = {
-            ResultExtensions.DOCX: cls._txt_to_docx,
-            ResultExtensions.PDF: cls._txt_to_pdf,
-        }
-        
-        convert_func = converters.get(ext)
-        if convert_func:
-            convert_func(txt_path, result)
-            return result
-        return None
+        return render(txt_path, ext)
 
  
 class LinkService(ILinkService):
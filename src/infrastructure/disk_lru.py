@@ -0,0 +1,62 @@
+import os
+from collections import OrderedDict
+
+
+class DiskLRU:
+    """Учёт размера дискового кэша в памяти: каталог сканируется один раз при создании.
+
+    Запись — все файлы key.<ext> из extensions. Вытеснение запускается, только когда сумма
+    превысила max_bytes, и освобождает место с запасом до low_watermark * max_bytes,
+    чтобы следующие записи не вытесняли по одной. Потокобезопасность — на вызывающем.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, extensions: tuple, low_watermark: float = 0.9):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.extensions = extensions
+        self.low_watermark = low_watermark
+        self.entries = OrderedDict()
+        self.total = 0
+        self._scan()
+
+    def _scan(self):
+        found = {}
+        for entry in os.scandir(self.directory):
+            key, ext = os.path.splitext(entry.name)
+            if entry.is_file() and ext in self.extensions:
+                stat = entry.stat()
+                mtime, size = found.get(key, (0.0, 0))
+                found[key] = (max(mtime, stat.st_mtime), size + stat.st_size)
+        for key, (_, size) in sorted(found.items(), key=lambda item: item[1][0]):
+            self.entries[key] = size
+            self.total += size
+
+    def path(self, key: str, ext: str) -> str:
+        return os.path.join(self.directory, f"{key}{ext}")
+
+    def touch(self, key: str):
+        if key in self.entries:
+            self.entries.move_to_end(key)
+
+    def add(self, key: str, size: int):
+        """Учитывает записанную (или перезаписанную) запись и при переполнении вытесняет старые."""
+        self.total += size - self.entries.pop(key, 0)
+        self.entries[key] = size
+        if self.total > self.max_bytes:
+            self._evict(key)
+
+    def remove(self, key: str):
+        self.total -= self.entries.pop(key, 0)
+        for ext in self.extensions:
+            try:
+                os.remove(self.path(key, ext))
+            except FileNotFoundError:
+                pass
+
+    def _evict(self, keep: str):
+        target = self.max_bytes * self.low_watermark
+        while self.total > target and self.entries:
+            key = next(iter(self.entries))
+            if key == keep:
+                break
+            self.remove(key)
@@ -0,0 +1,53 @@
+import asyncio
+import json
+import logging
+import os
+
+from src.domain.interfaces import IMediaService
+
+
+class AsyncMediaService(IMediaService):
+    """ffprobe/ffmpeg через asyncio.create_subprocess_exec.
+
+    Пробы и конвертации ограничены раздельно: быстрые ffprobe не ждут в очереди за долгими ffmpeg.
+    """
+
+    def __init__(self, max_concurrency: int = 2, probe_concurrency: int = 8):
+        self.convert_semaphore = asyncio.Semaphore(max_concurrency)
+        self.probe_semaphore = asyncio.Semaphore(probe_concurrency)
+
+    async def _run(self, semaphore: asyncio.Semaphore, *command) -> tuple[int, bytes, bytes]:
+        async with semaphore:
+            process = await asyncio.create_subprocess_exec(*command,
+                                                           stdout=asyncio.subprocess.PIPE,
+                                                           stderr=asyncio.subprocess.PIPE)
+            try:
+                stdout, stderr = await process.communicate()
+            except asyncio.CancelledError:
+                process.kill()
+                await process.wait()
+                raise
+            return process.returncode, stdout, stderr
+
+    async def get_media_duration(self, file_path):
+        code, stdout, stderr = await self._run(self.probe_semaphore, "ffprobe", "-v", "error",
+                                               "-print_format", "json", "-show_streams", file_path)
+        if code != 0:
+            raise RuntimeError(f"ffprobe error: {stderr.decode(errors='ignore')}")
+        probe = json.loads(stdout)
+        stream = next((s for s in probe['streams'] if 'duration' in s), None)
+        if stream:
+            return int(float(stream['duration']))
+        return None
+
+    async def covert_media_to_wav(self, filepath):
+        filename, ext = os.path.splitext(filepath)
+        if ext == ".wav":
+            return filepath
+        code, _, stderr = await self._run(self.convert_semaphore, 'ffmpeg', "-y", '-i', filepath, '-vn',
+                                          '-acodec', 'pcm_s16le', '-ar', '44100', '-ac', '2', filename + ".wav")
+        if code == 0 and os.path.exists(filename + ".wav"):
+            os.remove(filepath)
+            return filename + ".wav"
+        logging.error(f"ffmpeg error {filepath}: {stderr.decode(errors='ignore')[-500:]}")
+        return ""
@@ -0,0 +1,126 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from textwrap import wrap
+from typing import List
+
+from docx import Document
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen import canvas
+
+from src.domain.constants import ResultExtensions
+from src.domain.interfaces import IRenderService
+from src.domain.transcript import Transcript, structured_path
+
+FONT_NAME = "DejaVu"
+FONT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "DejaVuSans.ttf")
+
+
+def register_fonts():
+    """Регистрирует TTF один раз на процесс: разбор шрифта дороже отрисовки небольшого транскрипта."""
+    if FONT_NAME not in pdfmetrics.getRegisteredFontNames():
+        pdfmetrics.registerFont(TTFont(FONT_NAME, FONT_PATH))
+
+
+def transcript_lines(txt_file_path):
+    """Строки транскрипта: из .trs, если он есть рядом, иначе построчно из .txt."""
+    trs_path = structured_path(txt_file_path)
+    if os.path.exists(trs_path):
+        for i, (speaker, text) in enumerate(Transcript.read(trs_path).turns()):
+            if i:
+                yield ""
+            yield f"{speaker}: {text}" if speaker else text
+        return
+    with open(txt_file_path, "r", encoding="utf-8-sig") as file:
+        yield from file
+
+
+def txt_to_pdf(txt_file_path, pdf_file_path):
+    register_fonts()
+    page_width, page_height = A4
+    margin = 40
+    line_height = 14
+    font_size = 10
+    max_lines_per_page = int((page_height - 2 * margin) / line_height)
+
+    c = canvas.Canvas(pdf_file_path, pagesize=A4)
+    c.setFont(FONT_NAME, font_size)
+    max_chars_per_line = int((page_width - 2 * margin) / c.stringWidth("M", FONT_NAME, font_size))
+
+    y = page_height - margin
+    line_count = 0
+    for line in transcript_lines(txt_file_path):
+        for wrapped_line in wrap(line.strip(), width=max_chars_per_line):
+            if line_count >= max_lines_per_page:
+                c.showPage()
+                c.setFont(FONT_NAME, font_size)
+                y = page_height - margin
+                line_count = 0
+            c.drawString(margin, y, wrapped_line)
+            y -= line_height
+            line_count += 1
+    c.save()
+
+
+def txt_to_docx(txt_file_path, docx_file_path):
+    doc = Document()
+    for line in transcript_lines(txt_file_path):
+        doc.add_paragraph(line.strip())
+    doc.save(docx_file_path)
+
+
+def txt_to_subtitles(txt_file_path, subtitles_path):
+    """SRT/VTT по таймкодам из .trs, а если его нет — из .srt от diarize.py; без таймкодов формат пропускается."""
+    trs_path = structured_path(txt_file_path)
+    srt_path = os.path.splitext(txt_file_path)[0] + ".srt"
+    if os.path.exists(trs_path):
+        transcript = Transcript.read(trs_path)
+    elif os.path.exists(srt_path):
+        transcript = Transcript.from_srt(srt_path)
+    else:
+        logging.warning(f"Нет таймкодов для {os.path.basename(txt_file_path)}, {subtitles_path} не создан")
+        return False
+    if subtitles_path.endswith(".vtt"):
+        transcript.to_vtt(subtitles_path)
+    else:
+        transcript.to_srt(subtitles_path)
+
+
+RENDERERS = {
+    ResultExtensions.DOCX: txt_to_docx,
+    ResultExtensions.PDF: txt_to_pdf,
+    ResultExtensions.SRT: txt_to_subtitles,
+    ResultExtensions.VTT: txt_to_subtitles,
+}
+
+
+def render(txt_path, ext) -> str | None:
+    renderer = RENDERERS.get(ext)
+    if renderer is None:
+        return None
+    result = f"{os.path.splitext(txt_path)[0]}.{ext}"
+    if renderer(txt_path, result) is False:
+        return None
+    return result
+
+
+class ProcessRenderService(IRenderService):
+    """Рендерит PDF/DOCX в пуле процессов: все форматы одного транскрипта параллельно и вне event loop."""
+
+    def __init__(self, max_workers: int = 2):
+        self.executor = ProcessPoolExecutor(max_workers=max(1, max_workers),
+                                            mp_context=multiprocessing.get_context("spawn"),
+                                            initializer=register_fonts)
+
+    async def render(self, txt_path: str, formats: List[str]) -> List[str]:
+        loop = asyncio.get_running_loop()
+        results = await asyncio.gather(*(loop.run_in_executor(self.executor, render, txt_path, ext)
+                                         for ext in formats))
+        return [txt_path] + [result for result in results if result]
+
+    def stop(self):
+        self.executor.shutdown(cancel_futures=True)
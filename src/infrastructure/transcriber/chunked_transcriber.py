@@ -0,0 +1,171 @@
+import logging
+import os
+import queue
+import re
+import shutil
+import subprocess
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+from src.domain.interfaces import ITranscriber
+from src.domain.transcript import read_srt, write_srt
+from src.infrastructure.common_services import FileService
+
+
+def write_speaker_aware_txt(segments: list[dict], path: str):
+    """Тот же формат, что у get_speaker_aware_transcript в whisper-diarization."""
+    with open(path, "w", encoding="utf-8-sig") as f:
+        previous_speaker = None
+        for segment in segments:
+            if segment["speaker"] != previous_speaker:
+                if previous_speaker is not None:
+                    f.write("\n\n")
+                f.write(f"{segment['speaker']}: ")
+                previous_speaker = segment["speaker"]
+            f.write(segment["text"] + " ")
+
+
+def detect_silences(file_path: str, noise: str = "-30dB", min_duration: float = 0.5) -> list[float]:
+    """Середины пауз по ffmpeg silencedetect, в секундах."""
+    process = subprocess.run(["ffmpeg", "-hide_banner", "-i", file_path,
+                              "-af", f"silencedetect=noise={noise}:d={min_duration}", "-f", "null", "-"],
+                             capture_output=True, text=True)
+    starts = [float(x) for x in re.findall(r"silence_start: ([\d.]+)", process.stderr)]
+    ends = [float(x) for x in re.findall(r"silence_end: ([\d.]+)", process.stderr)]
+    return [(start + end) / 2 for start, end in zip(starts, ends)]
+
+
+def choose_cut_points(duration: float, chunk_seconds: int, silences: list[float]) -> list[float]:
+    """Режет примерно каждые chunk_seconds, сдвигая разрез к ближайшей паузе в пределах 20% длины куска."""
+    window = chunk_seconds * 0.2
+    cuts = []
+    target = chunk_seconds
+    while target < duration - window:
+        near = [s for s in silences if abs(s - target) <= window and (not cuts or s > cuts[-1])]
+        cut = min(near, key=lambda s: abs(s - target)) if near else target
+        cuts.append(cut)
+        target = cut + chunk_seconds
+    return cuts
+
+
+class ChunkedTranscriber(ITranscriber):
+    """Делит длинный файл по паузам и транскрибирует куски параллельно набором вложенных транскриберов.
+
+    Соседние куски перекрываются на overlap секунд: по перекрытию сопоставляются
+    метки спикеров, чтобы во всём транскрипте один человек оставался одним спикером.
+    """
+
+    def __init__(self, settings: dict, transcriber_factory: Callable[[int], ITranscriber]):
+        self.settings = settings
+        self.directory = settings['transcripts_dir']
+        self.threshold = int(settings.get('split_threshold', 1800))
+        self.chunk_seconds = int(settings.get('chunk_seconds', 600))
+        self.overlap = int(settings.get('overlap', 15))
+        self.pool_size = max(1, int(settings.get('pool_size', 4)))
+        self.accepts_media = bool(settings.get('stream_decode', False))
+        self.transcribers = [transcriber_factory(i) for i in range(self.pool_size)]
+        self.free_transcribers = queue.Queue()
+        for transcriber in self.transcribers:
+            self.free_transcribers.put(transcriber)
+        self.executor = ThreadPoolExecutor(max_workers=self.pool_size)
+
+    def set_transcrib_path(self, path):
+        self.directory = path
+
+    def transcribe(self, file_path):
+        duration = FileService.get_media_duration(file_path) or 0
+        cuts = choose_cut_points(duration, self.chunk_seconds, detect_silences(file_path)) \
+            if duration > self.threshold else []
+        if not cuts:
+            return self._transcribe_with_pool(file_path, self.directory)
+
+        name = os.path.splitext(os.path.basename(file_path))[0]
+        chunks_dir = os.path.join(self.directory, f"{name}_chunks")
+        os.makedirs(chunks_dir, exist_ok=True)
+        try:
+            bounds = list(zip([0.0] + cuts, cuts + [float(duration)]))
+            chunks = []
+            for i, (start, end) in enumerate(bounds):
+                offset = max(0.0, start - self.overlap) if i else 0.0
+                chunk_path = os.path.join(chunks_dir, f"{name}_part{i}.wav")
+                subprocess.run(["ffmpeg", "-y", "-hide_banner", "-loglevel", "error",
+                                "-ss", str(offset), "-to", str(end), "-i", file_path,
+                                "-vn", "-ac", "1", "-ar", "16000", "-c:a", "pcm_s16le", chunk_path],
+                               check=True)
+                chunks.append((chunk_path, offset, start))
+            logging.info(f"{os.path.basename(file_path)}: {len(chunks)} частей, пул {self.pool_size}")
+
+            results = list(self.executor.map(lambda chunk: self._transcribe_with_pool(chunk[0], chunks_dir), chunks))
+            if any(result is None for result in results):
+                return None
+            segments = self._stitch([(os.path.splitext(result)[0] + ".srt", offset, start)
+                                     for result, (_, offset, start) in zip(results, chunks)])
+        finally:
+            shutil.rmtree(chunks_dir, ignore_errors=True)
+
+        base = os.path.join(self.directory, name)
+        write_srt(((s["start_time"], s["end_time"], s["speaker"], s["text"]) for s in segments), base + ".srt")
+        write_speaker_aware_txt(segments, base + ".txt")
+        return base + ".txt"
+
+    def _transcribe_with_pool(self, file_path, directory):
+        transcriber = self.free_transcribers.get()
+        try:
+            transcriber.set_transcrib_path(directory)
+            return transcriber.transcribe(file_path)
+        finally:
+            self.free_transcribers.put(transcriber)
+
+    def _stitch(self, chunks: list[tuple[str, float, float]]) -> list[dict]:
+        merged = []
+        speakers = set()
+        for srt_path, offset, start in chunks:
+            shift, start_ms = int(offset * 1000), int(start * 1000)
+            segments = [{**s, "start_time": s["start_time"] + shift, "end_time": s["end_time"] + shift}
+                        for s in read_srt(srt_path)]
+            mapping = self._match_speakers(merged, segments, shift, start_ms, speakers)
+            for segment in segments:
+                if merged and segment["start_time"] < start_ms:
+                    # перекрытие уже расшифровано предыдущим куском
+                    if segment["end_time"] <= start_ms:
+                        continue
+                    # реплика идёт через разрез: предыдущий кусок слышал только её начало,
+                    # поэтому его обрезанные сегменты заменяются полной версией
+                    while merged and (merged[-1]["start_time"] + merged[-1]["end_time"]) / 2 >= segment["start_time"]:
+                        merged.pop()
+                segment["speaker"] = mapping[segment["speaker"]]
+                merged.append(segment)
+        return merged
+
+    def _match_speakers(self, merged, segments, overlap_start, overlap_end, speakers) -> dict:
+        """Сопоставляет локальные метки куска с глобальными по суммарному пересечению реплик в зоне перекрытия."""
+        shared = defaultdict(int)
+        previous = [s for s in merged if s["end_time"] > overlap_start]
+        for local in segments:
+            if local["start_time"] >= overlap_end:
+                break
+            for known in previous:
+                common = min(local["end_time"], known["end_time"], overlap_end) \
+                    - max(local["start_time"], known["start_time"], overlap_start)
+                if common > 0:
+                    shared[(local["speaker"], known["speaker"])] += common
+
+        mapping = {}
+        used = set()
+        for (local, known), _ in sorted(shared.items(), key=lambda item: -item[1]):
+            if local not in mapping and known not in used:
+                mapping[local] = known
+                used.add(known)
+        for segment in segments:
+            local = segment["speaker"]
+            if local in mapping:
+                continue
+            label = local
+            if merged:
+                label = f"Speaker {len(speakers)}"
+                while label in speakers:
+                    label += "'"
+            speakers.add(label)
+            mapping[local] = label
+        return mapping
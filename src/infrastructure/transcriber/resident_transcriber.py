@@ -0,0 +1,207 @@
+import atexit
+import logging
+import multiprocessing
+import os
+import runpy
+import subprocess
+import sys
+import threading
+import time
+
+from src.domain.interfaces import ITranscriber
+
+DIARIZE_SCRIPT = "src/infrastructure/transcriber/whisper-diarization/diarize.py"
+
+
+# Загрузчики моделей, которые diarize.py вызывает на каждый файл: (модуль, атрибут).
+# NeMo NeuralDiarizer из старых версий diarize.py не кэшируется: его конфиг привязан к манифесту задачи.
+CACHED_LOADERS = (
+    ("faster_whisper", "WhisperModel"),
+    ("ctc_forced_aligner", "load_alignment_model"),
+    ("deepmultilingualpunctuation", "PunctuationModel"),
+    ("diarization", "MSDDDiarizer"),
+)
+
+
+def _cache_loader(module_name: str, attr: str, timings: dict):
+    """Подменяет загрузчик модели фабрикой, которая грузит веса один раз на процесс."""
+    import importlib
+
+    try:
+        module = importlib.import_module(module_name)
+    except ImportError:
+        return
+    original = getattr(module, attr, None)
+    if original is None:
+        return
+    cache = {}
+
+    def cached_loader(*args, **kwargs):
+        key = repr((args, sorted(kwargs.items())))
+        if key not in cache:
+            started = time.perf_counter()
+            cache[key] = original(*args, **kwargs)
+            timings["model_load"] += time.perf_counter() - started
+        return cache[key]
+
+    setattr(module, attr, cached_loader)
+
+
+def _cache_models(timings: dict):
+    """Кэширует модели транскрибации, выравнивания, пунктуации и диаризации на время жизни процесса."""
+    for module_name, attr in CACHED_LOADERS:
+        _cache_loader(module_name, attr, timings)
+
+
+def decode_audio_pipe(input_file, sampling_rate: int = 16000):
+    """Декодирует медиа через ffmpeg прямо в память: f32le моно нужной частоты по pipe, без промежуточного WAV."""
+    import numpy as np
+
+    process = subprocess.Popen(["ffmpeg", "-nostdin", "-loglevel", "error", "-i", input_file,
+                                "-vn", "-ac", "1", "-ar", str(sampling_rate), "-f", "f32le", "pipe:1"],
+                               stdout=subprocess.PIPE)
+    buffer = bytearray()
+    chunk = bytearray(1 << 20)
+    view = memoryview(chunk)
+    while read := process.stdout.readinto(view):
+        buffer += view[:read]
+    if process.wait() != 0:
+        raise RuntimeError(f"ffmpeg не смог декодировать {input_file}")
+    return np.frombuffer(buffer, dtype=np.float32)
+
+
+def _use_pipe_decoder():
+    import faster_whisper
+
+    original = faster_whisper.decode_audio
+
+    def decode_audio(input_file, sampling_rate=16000, split_stereo=False):
+        if split_stereo or not isinstance(input_file, str):
+            return original(input_file, sampling_rate=sampling_rate, split_stereo=split_stereo)
+        return decode_audio_pipe(input_file, sampling_rate)
+
+    faster_whisper.decode_audio = decode_audio
+    faster_whisper.audio.decode_audio = decode_audio
+
+
+def _serve(conn, script_path: str, workdir: str | None = None, stream_decode: bool = False):
+    """Цикл дочернего процесса: один раз импортирует torch/модели и обслуживает запросы из pipe."""
+    started = time.perf_counter()
+    script_path = os.path.abspath(script_path)
+    sys.path.insert(0, os.path.dirname(script_path))
+    if workdir:
+        # diarize.py пишет temp_outputs в текущую директорию, у каждого воркера она своя
+        os.makedirs(workdir, exist_ok=True)
+        os.chdir(workdir)
+    timings = {"model_load": 0.0}
+    _cache_models(timings)
+    if stream_decode:
+        _use_pipe_decoder()
+    conn.send({"startup": time.perf_counter() - started})
+
+    while True:
+        request = conn.recv()
+        if request is None:
+            break
+        timings["model_load"] = 0.0
+        job_started = time.perf_counter()
+        argv = sys.argv
+        error = None
+        try:
+            sys.argv = [script_path, *request["args"]]
+            runpy.run_path(script_path, run_name="__main__")
+        except SystemExit as e:
+            if e.code:
+                error = f"diarize.py exited with code {e.code}"
+        except Exception as e:
+            error = repr(e)
+        finally:
+            sys.argv = argv
+        conn.send({"error": error,
+                   "model_load": timings["model_load"],
+                   "run": time.perf_counter() - job_started})
+
+
+class ResidentWhisperTranscriber(ITranscriber):
+    """Держит diarize.py в постоянном дочернем процессе, чтобы не загружать модели на каждый файл."""
+
+    def __init__(self, settings: dict[str, str]):
+        self.settings = settings
+        self.directory = self.settings['transcripts_dir']
+        self.script_path = self.settings.get('script_path', DIARIZE_SCRIPT)
+        self.workdir = self.settings.get('workdir')
+        self.accepts_media = bool(self.settings.get('stream_decode', False))
+        self.lock = threading.Lock()
+        self.process = None
+        self.conn = None
+        self.startup_time = 0.0
+        self.last_timings = {}
+
+    def set_transcrib_path(self, path):
+        self.directory = path
+
+    def is_alive(self):
+        return self.process is not None and self.process.is_alive()
+
+    def start(self):
+        ctx = multiprocessing.get_context("spawn")
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(target=_serve, args=(child_conn, self.script_path, self.workdir, self.accepts_media))
+        self.process.start()
+        child_conn.close()
+        # дочерний процесс не daemon (NeMo заводит свои процессы), поэтому без stop() интерпретатор
+        # повис бы в join из atexit multiprocessing; наш обработчик зарегистрирован позже и выполнится раньше
+        atexit.unregister(self.stop)
+        atexit.register(self.stop)
+        self.startup_time = self.conn.recv()["startup"]
+        logging.info(f"Воркер транскрибации запущен (pid={self.process.pid}) за {self.startup_time:.1f} c")
+
+    def stop(self):
+        if self.conn is not None:
+            try:
+                self.conn.send(None)
+            except (OSError, BrokenPipeError):
+                pass
+            self.conn.close()
+            self.conn = None
+        if self.process is not None:
+            self.process.join(timeout=10)
+            if self.process.is_alive():
+                self.process.kill()
+            self.process = None
+
+    def transcribe(self, file_path):
+        args = ["-a", os.path.abspath(file_path),
+                "--no-stem",
+                "--whisper-model", self.settings['model'],
+                "--device", self.settings['device'],
+                "--output-path", os.path.abspath(self.directory)]
+        with self.lock:
+            started = time.perf_counter()
+            startup = 0.0
+            try:
+                if not self.is_alive():
+                    self.start()
+                    startup = self.startup_time
+                self.conn.send({"args": args})
+                response = self.conn.recv()
+            except (EOFError, OSError) as e:
+                logging.error(f"Воркер транскрибации упал: {e}")
+                self.stop()
+                return None
+
+        self.last_timings = {
+            "startup": startup,
+            "model_load": response["model_load"],
+            "transcribe": response["run"] - response["model_load"],
+            "total": time.perf_counter() - started,
+        }
+        logging.info(f"Тайминги {os.path.basename(file_path)}: "
+                     + ", ".join(f"{k}={v:.2f}c" for k, v in self.last_timings.items()))
+
+        if response["error"]:
+            logging.error(f"Ошибка транскрибации {file_path}: {response['error']}")
+            return None
+
+        filename = f"{os.path.splitext(os.path.basename(file_path))[0]}.txt"
+        return os.path.join(self.directory, filename)
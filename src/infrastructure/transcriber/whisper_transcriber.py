@@ -8,6 +8,11 @@ class WhisperTranscriber(ITranscriber):
     def __init__(self, settings: dict[str, str]):
         self.settings = settings
         self.directory = self.settings['transcripts_dir']
+        self.workdir = self.settings.get('workdir')
+        # diarize.py декодирует вход через faster_whisper.decode_audio, WAV ему не нужен
+        self.accepts_media = bool(self.settings.get('stream_decode', False))
+        if self.workdir:
+            os.makedirs(self.workdir, exist_ok=True)
 
     def set_transcrib_path(self, path):
         self.directory = path
@@ -15,12 +20,13 @@ class WhisperTranscriber(ITranscriber):
     def transcribe(self, file_path):
 
         try:
-            subprocess.run(["python", "src/infrastructure/transcriber/whisper-diarization/diarize.py", 
-                            "-a", file_path, 
+            subprocess.run(["python", os.path.abspath("src/infrastructure/transcriber/whisper-diarization/diarize.py"), 
+                            "-a", os.path.abspath(file_path), 
                             "--no-stem", 
                             "--whisper-model", self.settings['model'], 
                             "--device", self.settings['device'],
-                            "--output-path", self.directory])
+                            "--output-path", os.path.abspath(self.directory)],
+                           cwd=self.workdir)
             
             filename= f"{os.path.splitext(os.path.basename(file_path))[0]}.txt"
             path = os.path.join(self.directory, filename)
@@ -0,0 +1,82 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+
+from src.domain.interfaces import ITranscriptCache
+from src.infrastructure.disk_lru import DiskLRU
+
+
+class DiskTranscriptCache(ITranscriptCache):
+    """Транскрипты по хэшу содержимого файла и настроек модели; LRU-вытеснение при превышении max_bytes.
+
+    Вместе с .txt хранятся .srt и .trs: без них попадание в кэш не смогло бы отдать субтитры.
+    """
+    CHUNK_SIZE = 1 << 20
+    SIBLINGS = (".srt", ".trs")
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+        self.lru = DiskLRU(self.directory, max_bytes, (".txt", *self.SIBLINGS))
+
+    def make_key(self, file_path, options):
+        digest = hashlib.blake2b(digest_size=20)
+        with open(file_path, "rb") as f:
+            while chunk := f.read(self.CHUNK_SIZE):
+                digest.update(chunk)
+        digest.update(json.dumps(options, sort_keys=True, default=str).encode())
+        return digest.hexdigest()
+
+    def _path(self, key, ext=".txt"):
+        return self.lru.path(key, ext)
+
+    def get(self, key, dest_path):
+        path = self._path(key)
+        dest_base = os.path.splitext(dest_path)[0]
+        with self.lock:
+            try:
+                shutil.copyfile(path, dest_path)
+                os.utime(path)
+                self.lru.touch(key)
+            except FileNotFoundError:
+                self.misses += 1
+                hit = False
+            else:
+                self.hits += 1
+                hit = True
+                for ext in self.SIBLINGS:
+                    try:
+                        shutil.copyfile(self._path(key, ext), dest_base + ext)
+                    except FileNotFoundError:
+                        pass
+        logging.info(f"Кэш транскриптов: {'попадание' if hit else 'промах'} {key[:12]} "
+                     f"(hits={self.hits}, misses={self.misses})")
+        return hit
+
+    def put(self, key, transcript_path):
+        if not transcript_path or not os.path.exists(transcript_path):
+            return
+        source_base = os.path.splitext(transcript_path)[0]
+        with self.lock:
+            # .txt кладётся последним: его наличие означает, что запись полная
+            size = 0
+            for ext in (*self.SIBLINGS, ".txt"):
+                source = source_base + ext
+                if not os.path.exists(source):
+                    try:
+                        os.remove(self._path(key, ext))
+                    except FileNotFoundError:
+                        pass
+                    continue
+                tmp_path = self._path(key, ext) + ".tmp"
+                shutil.copyfile(source, tmp_path)
+                size += os.path.getsize(tmp_path)
+                os.replace(tmp_path, self._path(key, ext))
+            self.lru.add(key, size)
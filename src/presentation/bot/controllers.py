@@ -1,5 +1,6 @@
 import os
 import asyncio
+import logging
 import re
 import shutil, random, string
 from functools import wraps
@@ -8,6 +9,8 @@ from functools import partial
 from aiogram.types import FSInputFile
 from src.application.use_cases import ApplicationService
 from src.domain.constants import LLMPrompts, ResultExtensions
+from src.domain.transcript import structured_path
+from .streaming import ThrottledMessage
 from .views import TranscibumViews, INITIAL_SELECTION, OPTIONS, GPTCallback
 
 
@@ -34,13 +37,13 @@ class TranscribumController():
         files = self.transcriber_service.queue.get_user_files_from_queue(user_id=message.from_user.id)
         files_message = ""
         print(files)
-        current_file = self.transcriber_service.queue.current_file
-        offset = 0
-        if current_file and current_file.user_id == message.from_user.id:
-            files_message += f"Файл {1}: {os.path.basename(current_file.file_path)}\nПозиция в очереди: {0}\n\n"
-            offset = 1
+        current_files = self.transcriber_service.queue.get_user_current_files(message.from_user.id)
+        for offset, current_file in enumerate(current_files):
+            files_message += f"Файл {offset + 1}: {os.path.basename(current_file)}\nПозиция в очереди: {0}\n\n"
+        offset = len(current_files)
+        positions = await self.transcriber_service.queue.get_user_positions(user_id=message.from_user.id)
         for position, file in enumerate(files):
-            pos = await self.transcriber_service.queue.get_position(user_id=message.from_user.id, file_path=file.file_path)
+            pos = positions[file.file_path]
             files_message += f"Файл {position+ 1 + offset}: {os.path.basename(file.file_path)}\nПозиция в очереди: {pos + 1}\n\n"
         if files_message:
             await self.bot.send_message(chat_id=message.from_user.id, text=files_message)
@@ -129,6 +132,7 @@ class TranscribumController():
                 user_id=user_id,
                 callback=self.handle_transcription_result,
                 notify_start_transcrib=self.notify_start_transcrib,
+                ai_callback=self.handle_ai_result,
                 on_insufficient_funds=lambda uid: self.bot.send_message(uid, self.views.top_up_balance_message()),
                 on_wrong_format=lambda uid: self.bot.send_message(uid, self.views.file_format_error())
             )
@@ -164,7 +168,7 @@ class TranscribumController():
                 prompt = LLMPrompts.MAKE_POST
             else:
                 prompt = LLMPrompts.MAKE_SUMMARY
-            result = self.transcriber_service.ai_service.generate_remote_api_answer(filepath, prompt)
+            result = await self.transcriber_service.generate_ai_answer(filepath, prompt)
             await self.bot.send_message(chat_id=user_id, text=result)
             print(filepath, task)
         else:
@@ -220,7 +224,7 @@ class TranscribumController():
             else:
                 file_name = file_obj.file_name or os.path.basename(local_file_path)
             input_path = os.path.join(user_path, file_name)
-            shutil.copy2(local_file_path, input_path)
+            await self.transcriber_service.ingest_file(local_file_path, input_path)
 
             if not self.transcriber_service.queue.get_user_files_from_queue(message.from_user.id):
                 await self.transcriber_service.user_service.cash_repo.remove_user_files(message.from_user.id)
@@ -235,7 +239,8 @@ class TranscribumController():
                 text=self.views.downloading_error()
             )
 
-    async def handle_transcription_result(self, output_files, error, user_id, ai_jobs=[]):
+    async def handle_transcription_result(self, output_files, error, user_id, keep_files=False):
+        """keep_files=True — файлы ещё нужны стадии LLM, удалит их handle_ai_result."""
         if error:
             await self.bot.send_message(
                 chat_id=user_id,  
@@ -249,9 +254,14 @@ class TranscribumController():
                     chat_id=user_id,
                     document=file
                 )
-        if ai_jobs:
+        if not keep_files:
+            self.transcriber_service.file_service.delete_files(*output_files, structured_path(output_files[0]))
+
+    async def handle_ai_result(self, output_files, user_id, ai_jobs):
+        try:
             await self.handle_ai_jobs(file=output_files[0], ai_jobs=ai_jobs, user_id=user_id)
-        self.transcriber_service.file_service.delete_files(*output_files)
+        finally:
+            self.transcriber_service.file_service.delete_files(*output_files, structured_path(output_files[0]))
 
 
     async def handle_ai_jobs(self, file, ai_jobs, user_id):
@@ -263,12 +273,34 @@ class TranscribumController():
         #     ai_service.make_embedding_collection,
         #     file_path = file
         # ))
-        for prompt in ai_jobs:
-            answer = self.transcriber_service.ai_service.generate_remote_api_answer(file, prompt)
-            await self.bot.send_message(
-                chat_id=user_id,  
-                text=answer,
-            )
+        messages = {}
+        for prompt in dict.fromkeys(ai_jobs):
+            messages[prompt] = ThrottledMessage(self.bot, user_id, self.config.STREAM_EDIT_INTERVAL)
+            await messages[prompt].start(self.views.ai_job_started())
+        streaming = set()
+
+        def on_progress(prompt, text):
+            if prompt is None:
+                for key, message in messages.items():
+                    if key not in streaming:
+                        message.update(self.views.ai_job_progress(text))
+                return
+            streaming.add(prompt)
+            if message := messages.get(prompt):
+                message.update(text, content=True)
+
+        try:
+            answers = await self.transcriber_service.generate_ai_answers(file, ai_jobs, on_progress=on_progress)
+        except Exception:
+            # иначе у пользователя навсегда останутся «⏳»
+            for message in messages.values():
+                try:
+                    await message.finish(self.views.ai_job_error())
+                except Exception as e:
+                    logging.error(f"Не удалось обновить сообщение об ошибке: {e}")
+            raise
+        for prompt, message in messages.items():
+            await message.finish(answers.get(prompt, ""), empty_text=self.views.ai_job_empty())
             # answer = await asyncio.to_thread(partial(
             #     ai_service.generate_answer,
             #     prompt = prompt,
@@ -0,0 +1,99 @@
+import asyncio
+import logging
+import time
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest, TelegramRetryAfter
+
+TELEGRAM_MESSAGE_LIMIT = 4096
+
+
+class ThrottledMessage:
+    """Сообщение, которое обновляется по мере генерации, но не чаще раза в interval секунд.
+
+    update() можно звать сколько угодно часто: в Telegram уходит только последний текст.
+    """
+
+    def __init__(self, bot: Bot, chat_id: int, interval: float = 1.5):
+        self.bot = bot
+        self.chat_id = chat_id
+        self.interval = interval
+        self.message_id = None
+        self.pending = None
+        self.shown = None
+        self.changed = asyncio.Event()
+        self.task = None
+        self.started = time.perf_counter()
+        self.first_content = None
+
+    async def start(self, text: str):
+        message = await self.bot.send_message(chat_id=self.chat_id, text=text)
+        self.message_id = message.message_id
+        self.shown = text
+        self.task = asyncio.create_task(self._flush_loop())
+
+    def update(self, text: str, content: bool = False):
+        """content=False — служебный статус, True — сам ответ (от него считается время до первого текста)."""
+        if not text.strip():
+            return
+        if content and self.first_content is None:
+            self.first_content = time.perf_counter() - self.started
+        self.pending = text
+        self.changed.set()
+
+    async def stop(self):
+        """Останавливает обновления и дожидается отмены: незавершённая правка не перезапишет итоговый текст."""
+        if self.task:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            except Exception as e:
+                logging.warning(f"Обновление сообщения {self.message_id} завершилось с ошибкой: {e!r}")
+            self.task = None
+
+    async def finish(self, text: str, empty_text: str = "Пустой ответ"):
+        """Останавливает обновления и выводит итоговый текст; хвост длиннее лимита Telegram уходит отдельными сообщениями.
+
+        Пустой текст Telegram не примет, вместо него показывается empty_text.
+        """
+        await self.stop()
+        if not text or not text.strip():
+            text = empty_text
+        parts = [text[i:i + TELEGRAM_MESSAGE_LIMIT] for i in range(0, len(text), TELEGRAM_MESSAGE_LIMIT)] or [text]
+        await self._edit(parts[0])
+        for part in parts[1:]:
+            await self.bot.send_message(chat_id=self.chat_id, text=part)
+        if self.first_content is not None:
+            logging.info(f"Первый текст ответа через {self.first_content:.1f} c, "
+                         f"весь ответ через {time.perf_counter() - self.started:.1f} c")
+
+    async def _flush_loop(self):
+        while True:
+            await self.changed.wait()
+            self.changed.clear()
+            text = self.pending
+            if len(text) > TELEGRAM_MESSAGE_LIMIT:
+                text = text[:TELEGRAM_MESSAGE_LIMIT - 1] + "…"
+            try:
+                await self._edit(text)
+            except Exception as e:
+                # промежуточный текст не важен: сеть может вернуться к следующей правке или к finish
+                logging.warning(f"Не удалось обновить сообщение {self.message_id}: {e!r}")
+            await asyncio.sleep(self.interval)
+
+    async def _edit(self, text: str):
+        if text == self.shown:
+            return
+        while True:
+            try:
+                await self.bot.edit_message_text(text=text, chat_id=self.chat_id, message_id=self.message_id)
+                break
+            except TelegramRetryAfter as e:
+                await asyncio.sleep(e.retry_after)
+            except TelegramBadRequest as e:
+                # "message is not modified" и подобное — просто пропускаем это обновление
+                logging.warning(f"Не удалось обновить сообщение {self.message_id}: {e}")
+                break
+        self.shown = text
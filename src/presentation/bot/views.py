@@ -12,6 +12,8 @@ class GPTCallback(CallbackData, prefix="gpt"):
 INITIAL_SELECTION = {
     ResultExtensions.DOCX: False,
     ResultExtensions.PDF : False,
+    ResultExtensions.SRT: False,
+    ResultExtensions.VTT: False,
     LLMPrompts.MAKE_POST: False,
     LLMPrompts.MAKE_SUMMARY: False
     }
@@ -19,6 +21,8 @@ INITIAL_SELECTION = {
 OPTIONS = {
     ResultExtensions.DOCX: "📝 DOCX",
     ResultExtensions.PDF : "📄 PDF",
+    ResultExtensions.SRT: "🎬 SRT",
+    ResultExtensions.VTT: "🎬 VTT",
     LLMPrompts.MAKE_POST: "✂️ Короткий пост",
     LLMPrompts.MAKE_SUMMARY: "📋 Саммари"
     }
@@ -66,6 +70,22 @@ class TranscibumViews():
     def downloading_error() -> str:
         return "Ошибка при загрузке файла"
 
+    @staticmethod
+    def ai_job_started() -> str:
+        return "⏳ Готовлю ответ..."
+
+    @staticmethod
+    def ai_job_progress(status) -> str:
+        return f"⏳ {status}"
+
+    @staticmethod
+    def ai_job_empty() -> str:
+        return "Модель вернула пустой ответ"
+
+    @staticmethod
+    def ai_job_error() -> str:
+        return "Не удалось подготовить ответ, попробуйте позже"
+
     @staticmethod
     def get_gpt_button(file_path, prompt) -> InlineKeyboardMarkup:
         builder = InlineKeyboardBuilder()
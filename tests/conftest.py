@@ -0,0 +1,153 @@
+import asyncio
+import os
+import sys
+import time
+import types
+from typing import Callable, Dict, List, Optional
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.domain.interfaces import IAIService  # noqa: E402
+
+
+class FakeCollection:
+    def __init__(self, name, metadata):
+        self.name = name
+        self.metadata = metadata
+        self.records = {}
+
+    def add(self, ids, embeddings, documents):
+        assert len(ids) == len(embeddings) == len(documents)
+        for id_, embedding, document in zip(ids, embeddings, documents):
+            self.records[id_] = (embedding, document)
+
+    def modify(self, metadata):
+        self.metadata = metadata
+
+
+class FakeChromaClient:
+    def __init__(self, *args, **kwargs):
+        self.collections = {}
+
+    def get_collection(self, name):
+        if name not in self.collections:
+            raise ValueError(f"Collection {name} does not exist")
+        return self.collections[name]
+
+    def create_collection(self, name, metadata):
+        self.collections[name] = FakeCollection(name, metadata)
+        return self.collections[name]
+
+    def delete_collection(self, name):
+        del self.collections[name]
+
+    def list_collections(self):
+        return list(self.collections.values())
+
+
+@pytest.fixture
+def fake_llm_modules(monkeypatch):
+    """Подменяет chromadb, ollama и yandex_cloud_ml_sdk, чтобы AIService собирался без них;
+    ollama.embed по умолчанию возвращает для текста вектор [len(text)]."""
+    chromadb = types.ModuleType("chromadb")
+    chromadb.Client = chromadb.PersistentClient = FakeChromaClient
+    ollama = types.ModuleType("ollama")
+    ollama.embed = lambda model, input: {"embeddings": [[float(len(text))] for text in input]}
+    sdk = types.ModuleType("yandex_cloud_ml_sdk")
+    sdk.YCloudML = lambda **kwargs: types.SimpleNamespace(**kwargs)
+    for name, module in (("chromadb", chromadb), ("ollama", ollama), ("yandex_cloud_ml_sdk", sdk)):
+        monkeypatch.setitem(sys.modules, name, module)
+    monkeypatch.delitem(sys.modules, "src.infrastructure.LLM.ai_service", raising=False)
+    return types.SimpleNamespace(chromadb=chromadb, ollama=ollama, sdk=sdk)
+
+
+class MemoryJobStore:
+    """IJobStore в памяти: записи и сроки видимости без Redis."""
+
+    def __init__(self):
+        self.records = {}
+        self.in_flight = {}
+
+    async def save(self, job_id, record):
+        self.records[job_id] = dict(record)
+
+    async def load(self, job_id):
+        return self.records.get(job_id)
+
+    async def load_all(self):
+        return list(self.records.values())
+
+    async def mark_in_flight(self, job_id, timeout):
+        self.in_flight[job_id] = timeout
+
+    async def get_expired(self):
+        return []
+
+    async def release(self, job_id):
+        self.in_flight.pop(job_id, None)
+
+    async def ack(self, job_id):
+        self.records.pop(job_id, None)
+        self.in_flight.pop(job_id, None)
+
+
+class FakeAIService(IAIService):
+    """Блокирующая «модель»: отвечает по словам из рабочего потока, каждый шаг занимает delay секунд.
+
+    Без answers ответ на промпт — «<prompt>: <file_path>».
+    """
+
+    def __init__(self, answers: Optional[Dict[str, str]] = None, delay: float = 0.0,
+                 error: Optional[Exception] = None):
+        self.answers = answers
+        self.delay = delay
+        self.error = error
+
+    def make_embedding_collection(self, file_path: str) -> str:
+        return "collection"
+
+    def generate_answer(self, prompt: str, collection_name: str) -> str:
+        return prompt
+
+    def cleanup(self) -> None:
+        pass
+
+    def generate_remote_api_answer(self, file_path: str, prompt: str) -> str:
+        return self.generate_remote_api_answers(file_path, [prompt])[prompt]
+
+    def generate_remote_api_answers(self, file_path: str, prompts: List[str],
+                                    on_progress: Optional[Callable[[Optional[str], str], None]] = None) -> Dict[str, str]:
+        on_progress = on_progress or (lambda prompt, text: None)
+        answers = {}
+        for prompt in prompts:
+            on_progress(None, f"processing {prompt}")
+            time.sleep(self.delay)
+            if self.error:
+                raise self.error
+            answers[prompt] = self.answers[prompt] if self.answers is not None else f"{prompt}: {file_path}"
+            text = ""
+            for word in answers[prompt].split():
+                text = f"{text} {word}".strip()
+                on_progress(prompt, text)
+                time.sleep(self.delay)
+        return answers
+
+
+async def run_with_ticker(coro, interval=0.01):
+    """Выполняет coro и считает, сколько раз за это время успел проснуться соседний таймер."""
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(interval)
+            ticks += 1
+
+    task = asyncio.create_task(ticker())
+    try:
+        result = await coro
+    finally:
+        task.cancel()
+    return result, ticks
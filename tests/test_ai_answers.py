@@ -0,0 +1,54 @@
+import asyncio
+from types import SimpleNamespace
+
+from conftest import FakeAIService, run_with_ticker
+from src.application.use_cases import ApplicationService
+from src.infrastructure.LLM.async_ai_service import AsyncAIService
+
+
+def _service(ai_service, async_ai_service=None):
+    return ApplicationService(service=None, file_service=None, user_service=None, queue=None,
+                              link_service=None, ai_service=ai_service,
+                              config=SimpleNamespace(TRANSCRIPTS_DIR="transcripts"),
+                              async_ai_service=async_ai_service)
+
+
+def test_generate_ai_answer_keeps_event_loop_responsive():
+    ai_service = FakeAIService(delay=0.2)
+    service = _service(ai_service, AsyncAIService(ai_service))
+
+    answer, ticks = asyncio.run(run_with_ticker(service.generate_ai_answer("a.txt", "summary")))
+
+    assert answer == "summary: a.txt"
+    assert ticks >= 10
+
+
+def test_generate_ai_answer_without_async_service_runs_in_thread():
+    service = _service(FakeAIService(delay=0.2))
+
+    answer, ticks = asyncio.run(run_with_ticker(service.generate_ai_answer("a.txt", "summary")))
+
+    assert answer == "summary: a.txt"
+    assert ticks >= 10
+
+
+def test_progress_is_delivered_on_event_loop():
+    ai_service = FakeAIService({"p1": "один", "p2": "два"}, delay=0.05)
+    service = _service(ai_service, AsyncAIService(ai_service))
+    events = []
+
+    async def scenario():
+        loop = asyncio.get_running_loop()
+
+        def on_progress(prompt, text):
+            assert asyncio.get_running_loop() is loop
+            events.append((prompt, text))
+
+        answers = await service.generate_ai_answers("a.txt", ["p1", "p2"], on_progress)
+        await asyncio.sleep(0)
+        return answers
+
+    answers = asyncio.run(scenario())
+
+    assert answers == {"p1": "один", "p2": "два"}
+    assert events == [(None, "processing p1"), ("p1", "один"), (None, "processing p2"), ("p2", "два")]
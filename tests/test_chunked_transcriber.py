@@ -0,0 +1,40 @@
+from src.domain.transcript import write_srt
+from src.infrastructure.transcriber.chunked_transcriber import ChunkedTranscriber
+
+
+def _transcriber(tmp_path):
+    return ChunkedTranscriber({"transcripts_dir": str(tmp_path), "pool_size": 1},
+                              transcriber_factory=lambda i: None)
+
+
+def _srt(tmp_path, name, segments):
+    path = tmp_path / name
+    write_srt(segments, str(path))
+    return str(path)
+
+
+def test_segment_straddling_cut_is_kept(tmp_path):
+    # разрез на 600 с посреди речи, второй кусок начинается с 585 с (перекрытие 15 с)
+    first = _srt(tmp_path, "part0.srt", [(0, 590_000, "Speaker 0", "начало"),
+                                         (599_000, 600_000, "Speaker 0", "обрезано")])
+    second = _srt(tmp_path, "part1.srt", [(0, 5_000, "Speaker 0", "начало"),
+                                          (14_000, 40_000, "Speaker 0", "обрезано целиком"),
+                                          (40_000, 60_000, "Speaker 1", "дальше")])
+
+    merged = _transcriber(tmp_path)._stitch([(first, 0.0, 0.0), (second, 585.0, 600.0)])
+
+    assert [(s["start_time"], s["end_time"], s["text"]) for s in merged] == [
+        (0, 590_000, "начало"),
+        (599_000, 625_000, "обрезано целиком"),
+        (625_000, 645_000, "дальше"),
+    ]
+
+
+def test_overlap_segments_are_not_duplicated(tmp_path):
+    first = _srt(tmp_path, "part0.srt", [(0, 595_000, "Speaker 0", "первая часть")])
+    second = _srt(tmp_path, "part1.srt", [(0, 10_000, "Speaker 0", "первая часть"),
+                                          (15_000, 30_000, "Speaker 0", "вторая часть")])
+
+    merged = _transcriber(tmp_path)._stitch([(first, 0.0, 0.0), (second, 585.0, 600.0)])
+
+    assert [s["text"] for s in merged] == ["первая часть", "вторая часть"]
@@ -0,0 +1,56 @@
+import os
+
+from src.infrastructure.disk_lru import DiskLRU
+from src.infrastructure.LLM.completion_cache import DiskCompletionCache
+
+
+def _write(lru, key, size, ext=".bin"):
+    with open(lru.path(key, ext), "wb") as f:
+        f.write(b"x" * size)
+    lru.add(key, size)
+
+
+def test_evicts_least_recently_used_down_to_watermark(tmp_path):
+    lru = DiskLRU(str(tmp_path), max_bytes=100, extensions=(".bin",), low_watermark=0.7)
+    for key in ("a", "b", "c"):
+        _write(lru, key, 30)
+    lru.touch("a")
+
+    _write(lru, "d", 30)
+
+    assert set(lru.entries) == {"a", "d"}
+    assert lru.total == 60
+    assert sorted(os.listdir(tmp_path)) == ["a.bin", "d.bin"]
+
+
+def test_overwrite_replaces_size(tmp_path):
+    lru = DiskLRU(str(tmp_path), max_bytes=100, extensions=(".bin",))
+    _write(lru, "a", 40)
+    _write(lru, "a", 10)
+
+    assert lru.total == 10
+
+
+def test_existing_files_are_accounted_once(tmp_path):
+    (tmp_path / "old.txt").write_bytes(b"x" * 10)
+    (tmp_path / "old.srt").write_bytes(b"x" * 5)
+    (tmp_path / "ignored.tmp").write_bytes(b"x" * 50)
+
+    lru = DiskLRU(str(tmp_path), max_bytes=100, extensions=(".txt", ".srt"))
+
+    assert dict(lru.entries) == {"old": 15}
+    lru.remove("old")
+    assert sorted(os.listdir(tmp_path)) == ["ignored.tmp"]
+
+
+def test_completion_cache_does_not_rescan_on_put(tmp_path, monkeypatch):
+    cache = DiskCompletionCache(str(tmp_path), max_bytes=1 << 20, ttl=3600)
+    scans = []
+    monkeypatch.setattr(os, "scandir", lambda *args: scans.append(args) or iter(()))
+
+    for i in range(5):
+        cache.put(f"k{i}", "answer")
+
+    assert scans == []
+    assert cache.get("k3") == "answer"
+    assert len(cache.lru.entries) == 5
@@ -0,0 +1,104 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.infrastructure.LLM.text_chunker import estimate_tokens, pack_lines
+
+
+def test_pack_lines_respects_budget():
+    lines = [f"Speaker {i % 3}: " + "слово " * (i % 17 + 1) for i in range(200)]
+
+    passages = pack_lines(lines, budget=40)
+
+    assert all(estimate_tokens(passage) <= 40 for passage in passages)
+    assert "\n".join(passages).split("\n") == [line.strip() for line in lines]
+
+
+def test_pack_lines_splits_long_line():
+    line = "Первое предложение. " * 50
+
+    passages = pack_lines([line, "короткая строка"], budget=30)
+
+    assert len(passages) > 1
+    assert all(estimate_tokens(passage) <= 30 for passage in passages)
+    assert passages[-1].endswith("короткая строка")
+
+
+def test_pack_lines_merges_short_lines():
+    assert pack_lines(["a", "b", "c"], budget=10) == ["a\nb\nc"]
+    assert pack_lines([], budget=10) == []
+
+
+@pytest.mark.parametrize("batch_size", [1, 3, 7, 100])
+def test_batch_boundaries_map_to_passage_ids(tmp_path, fake_llm_modules, batch_size):
+    from src.infrastructure.LLM.ai_service import AIService
+
+    calls = []
+
+    def embed(model, input):
+        calls.append(list(input))
+        return {"embeddings": [[float(hash(text))] for text in input]}
+
+    fake_llm_modules.ollama.embed = embed
+    transcript = tmp_path / "t.txt"
+    transcript.write_text("\n".join(f"line {i}" for i in range(20)), encoding="utf-8")
+    service = AIService(auth="", folder_id="", embedding_batch_size=batch_size,
+                        embedding_concurrency=3, passage_tokens=2)
+
+    collection = service.client.get_collection(service.make_embedding_collection(str(transcript)))
+
+    assert len(calls) == -(-20 // batch_size)
+    assert all(len(batch) <= batch_size for batch in calls)
+    assert sorted(collection.records, key=int) == [str(i) for i in range(20)]
+    for i in range(20):
+        embedding, document = collection.records[str(i)]
+        assert document == f"line {i}"
+        assert embedding == [float(hash(document))]
+    assert collection.metadata["complete"] is True
+
+
+def test_failed_batch_leaves_no_complete_index(tmp_path, fake_llm_modules):
+    from src.infrastructure.LLM.ai_service import AIService
+
+    def embed(model, input):
+        if "line 5" in input:
+            raise ConnectionError("ollama is down")
+        return {"embeddings": [[1.0] for _ in input]}
+
+    fake_llm_modules.ollama.embed = embed
+    transcript = tmp_path / "t.txt"
+    transcript.write_text("\n".join(f"line {i}" for i in range(20)), encoding="utf-8")
+    service = AIService(auth="", folder_id="", embedding_batch_size=4, passage_tokens=2)
+
+    with pytest.raises(RuntimeError, match="4-7"):
+        service.make_embedding_collection(str(transcript))
+    assert service.client.collections == {}
+
+    fake_llm_modules.ollama.embed = lambda model, input: {"embeddings": [[1.0] for _ in input]}
+    collection = service.client.get_collection(service.make_embedding_collection(str(transcript)))
+    assert len(collection.records) == 20
+    assert collection.metadata["complete"] is True
+
+
+def test_different_files_are_indexed_concurrently(tmp_path, fake_llm_modules):
+    from src.infrastructure.LLM.ai_service import AIService
+
+    barrier = threading.Barrier(2, timeout=5)
+
+    def embed(model, input):
+        barrier.wait()
+        return {"embeddings": [[1.0] for _ in input]}
+
+    fake_llm_modules.ollama.embed = embed
+    transcripts = []
+    for name in ("a.txt", "b.txt"):
+        transcripts.append(tmp_path / name)
+        transcripts[-1].write_text(f"{name} line", encoding="utf-8")
+    service = AIService(auth="", folder_id="", embedding_concurrency=2)
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        names = list(executor.map(service.make_embedding_collection, map(str, transcripts)))
+
+    assert len(set(names)) == 2
+    assert all(service.client.get_collection(name).metadata["complete"] for name in names)
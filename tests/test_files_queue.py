@@ -0,0 +1,54 @@
+import asyncio
+
+from src.application.use_cases import FilesQueue
+from src.domain.constants import SchedulingPolicy
+from src.domain.entities import QueueElement
+
+
+def _element(user_id, name, duration=None):
+    return QueueElement(user_id=user_id, file_path=name, duration=duration, options={})
+
+
+async def _drain(queue):
+    order = []
+    while any(queue.user_queues.values()):
+        order.append((await queue.get_file_from_queue()).file_path)
+    return order
+
+
+def test_duration_update_retags_head():
+    async def scenario():
+        queue = FilesQueue(policy=SchedulingPolicy.WEIGHTED_FAIR)
+        long_file = _element(1, "long")
+        await queue.add_file_to_queue(long_file, persist=False)
+        await queue.add_file_to_queue(_element(2, "short", duration=100), persist=False)
+
+        await queue.update(long_file, duration=3600)
+
+        positions = {**await queue.get_user_positions(1), **await queue.get_user_positions(2)}
+        peeked = [element.file_path for element in await queue.peek_next(2)]
+        return positions, peeked, await _drain(queue)
+
+    positions, peeked, order = asyncio.run(scenario())
+
+    assert order == ["short", "long"]
+    assert peeked == order
+    assert positions == {"short": 0, "long": 1}
+
+
+def test_duration_update_of_queued_file_keeps_order_consistent():
+    async def scenario():
+        queue = FilesQueue(policy=SchedulingPolicy.WEIGHTED_FAIR)
+        first, second = _element(1, "a1", duration=10), _element(1, "a2")
+        for element in (first, second, _element(2, "b1", duration=50), _element(2, "b2", duration=50)):
+            await queue.add_file_to_queue(element, persist=False)
+
+        await queue.update(second, duration=500)
+
+        peeked = [element.file_path for element in await queue.peek_next(4)]
+        return peeked, await _drain(queue)
+
+    peeked, order = asyncio.run(scenario())
+
+    assert order == ["a1", "b1", "b2", "a2"]
+    assert peeked == order
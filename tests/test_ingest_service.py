@@ -0,0 +1,52 @@
+import asyncio
+import errno
+import os
+
+import pytest
+
+from src.infrastructure import ingest_service
+from src.infrastructure.ingest_service import LinkingIngestService
+
+
+def _no_hardlink(monkeypatch):
+    def link(src, dst):
+        raise OSError(errno.EXDEV, "cross-device link")
+
+    monkeypatch.setattr(ingest_service.os, "link", link)
+
+
+def _failing_ioctl(code):
+    def ioctl(fd, request, arg):
+        raise OSError(code, os.strerror(code))
+    return ioctl
+
+
+@pytest.mark.parametrize("code", [errno.EOPNOTSUPP, errno.EIO, errno.ENOSPC])
+def test_failed_reflink_leaves_no_empty_destination(tmp_path, monkeypatch, code):
+    _no_hardlink(monkeypatch)
+    monkeypatch.setattr(ingest_service.fcntl, "ioctl", _failing_ioctl(code))
+    src, dst = tmp_path / "upload.mp3", tmp_path / "downloads.mp3"
+    src.write_bytes(b"audio")
+    service = LinkingIngestService()
+
+    if code == errno.EOPNOTSUPP:
+        asyncio.run(service.ingest(str(src), str(dst)))
+        assert dst.read_bytes() == b"audio"
+        assert service.metrics["copy"] == 1
+    else:
+        with pytest.raises(OSError):
+            asyncio.run(service.ingest(str(src), str(dst)))
+        assert not dst.exists()
+    assert src.read_bytes() == b"audio"
+
+
+def test_hardlink_is_preferred(tmp_path):
+    src, dst = tmp_path / "upload.mp3", tmp_path / "downloads.mp3"
+    src.write_bytes(b"audio")
+    service = LinkingIngestService()
+
+    asyncio.run(service.ingest(str(src), str(dst)))
+
+    assert os.path.samefile(src, dst)
+    assert service.metrics["hardlink"] == 1
+    assert service.metrics["bytes_linked"] == 5
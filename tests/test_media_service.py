@@ -0,0 +1,55 @@
+import asyncio
+import json
+import os
+import stat
+import sys
+
+from conftest import run_with_ticker
+from src.infrastructure.media_service import AsyncMediaService
+
+
+def _fake_tool(directory, name, body):
+    path = directory / name
+    path.write_text(f"#!{sys.executable}\n{body}")
+    path.chmod(path.stat().st_mode | stat.S_IEXEC)
+
+
+def _install_fake_ffmpeg(tmp_path, monkeypatch, probe_delay, convert_delay):
+    probe = json.dumps({"streams": [{"codec_type": "audio", "duration": "42.7"}]})
+    _fake_tool(tmp_path, "ffprobe", f"import time\ntime.sleep({probe_delay})\nprint({probe!r})\n")
+    _fake_tool(tmp_path, "ffmpeg", f"import sys, time\ntime.sleep({convert_delay})\nopen(sys.argv[-1], 'wb').close()\n")
+    monkeypatch.setenv("PATH", f"{tmp_path}{os.pathsep}{os.environ['PATH']}")
+
+
+def test_slow_ffprobe_does_not_block_event_loop(tmp_path, monkeypatch):
+    _install_fake_ffmpeg(tmp_path, monkeypatch, probe_delay=0.5, convert_delay=0.5)
+
+    async def scenario():
+        return await run_with_ticker(AsyncMediaService().get_media_duration("input.mp3"))
+
+    duration, ticks = asyncio.run(scenario())
+
+    assert duration == 42
+    assert ticks >= 10
+
+
+def test_probe_is_not_queued_behind_conversions(tmp_path, monkeypatch):
+    _install_fake_ffmpeg(tmp_path, monkeypatch, probe_delay=0.1, convert_delay=2.0)
+    source = tmp_path / "input.mp3"
+    source.write_bytes(b"")
+
+    async def scenario():
+        service = AsyncMediaService(max_concurrency=1, probe_concurrency=1)
+        conversion = asyncio.create_task(service.covert_media_to_wav(str(source)))
+        await asyncio.sleep(0.1)
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        await service.get_media_duration(str(source))
+        probe_time = loop.time() - started
+        assert not conversion.done()
+        return probe_time, await conversion
+
+    probe_time, wav_path = asyncio.run(scenario())
+
+    assert probe_time < 1.5
+    assert wav_path == str(tmp_path / "input.wav")
@@ -0,0 +1,129 @@
+import asyncio
+import os
+from types import SimpleNamespace
+
+from conftest import MemoryJobStore
+from src.application.use_cases import ApplicationService, FilesQueue, TranscriberQueueProcessor
+from src.domain.entities import QueueElement
+from src.domain.interfaces import ITranscriber
+from src.infrastructure.common_services import FileService
+
+
+class FakeTranscriber(ITranscriber):
+    accepts_media = True
+
+    def __init__(self):
+        self.directory = None
+
+    def set_transcrib_path(self, path):
+        self.directory = path
+
+    def transcribe(self, file_path):
+        path = os.path.join(self.directory, os.path.splitext(os.path.basename(file_path))[0] + ".txt")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("Speaker 0: привет")
+        return path
+
+
+class FakeUserService:
+    async def get_user_id(self, adapter_id):
+        return adapter_id
+
+
+def _processor(tmp_path, store, **kwargs):
+    queue = FilesQueue(store=store)
+    service = ApplicationService(service=FakeTranscriber(), file_service=FileService, user_service=FakeUserService(),
+                                 queue=queue, link_service=None, ai_service=None,
+                                 config=SimpleNamespace(TRANSCRIPTS_DIR=str(tmp_path / "transcripts")))
+    processor = TranscriberQueueProcessor(service, **kwargs)
+    processor.transcribers = [(None, None)]
+    return processor
+
+
+async def _enqueue(tmp_path, queue, delivered, name="upload", prompts=(), ai_callback=None):
+    media = tmp_path / f"{name}.mp3"
+    media.write_bytes(b"audio")
+
+    async def callback(output_files, error, user_id, keep_files=False):
+        delivered.append((output_files, error))
+
+    async def notify(id, file_name):
+        pass
+
+    await queue.add_file_to_queue(QueueElement(user_id=1, file_path=str(media), duration=10,
+                                               options={"formats": [], "prompts": list(prompts)},
+                                               callback=callback, notify_start_transcrib=notify,
+                                               ai_callback=ai_callback))
+    return media
+
+
+def test_job_is_acked_only_after_delivery(tmp_path):
+    async def scenario():
+        store = MemoryJobStore()
+        processor = _processor(tmp_path, store)
+        delivered = []
+        media = await _enqueue(tmp_path, processor.files_queue, delivered)
+
+        job = await processor.transcribe_stage(await processor.files_queue.get_file_from_queue(), 0)
+        assert len(store.records) == 1 and media.exists()
+        assert processor.files_queue.get_user_current_files(1) == []
+
+        job = await processor.render_stage(job, 0)
+        assert await processor.upload_stage(job, 0) is None
+        return store, media, delivered
+
+    store, media, delivered = asyncio.run(scenario())
+
+    assert store.records == {}
+    assert not media.exists()
+    assert delivered[0][1] is None and delivered[0][0][0].endswith("upload.txt")
+
+
+def test_undelivered_job_survives_restart(tmp_path):
+    async def scenario():
+        store = MemoryJobStore()
+        processor = _processor(tmp_path, store)
+        media = await _enqueue(tmp_path, processor.files_queue, [])
+        await processor.transcribe_stage(await processor.files_queue.get_file_from_queue(), 0)
+
+        # процесс упал, пока результат ждал в очереди рендера
+        restarted = FilesQueue(store=store)
+        await restarted.restore()
+        return await restarted.get_file_from_queue(), media
+
+    restored, media = asyncio.run(scenario())
+
+    assert restored.file_path == str(media)
+    assert media.exists()
+
+
+def test_slow_llm_job_does_not_stall_uploads(tmp_path):
+    async def scenario():
+        store = MemoryJobStore()
+        processor = _processor(tmp_path, store, upload_workers=1, llm_workers=1)
+        delivered = []
+        llm_started, llm_release = asyncio.Event(), asyncio.Event()
+
+        async def ai_callback(output_files, user_id, prompts):
+            llm_started.set()
+            await llm_release.wait()
+
+        processor.pipeline.start()
+        try:
+            await _enqueue(tmp_path, processor.files_queue, delivered, "with_llm", ["summary"], ai_callback)
+            await asyncio.wait_for(llm_started.wait(), 5)
+            await _enqueue(tmp_path, processor.files_queue, delivered, "plain")
+            while len(delivered) < 2:
+                await asyncio.sleep(0.01)
+            pending = set(store.records)
+            llm_release.set()
+            while store.records:
+                await asyncio.sleep(0.01)
+        finally:
+            processor.stop()
+        return delivered, pending
+
+    delivered, pending = asyncio.run(asyncio.wait_for(scenario(), 10))
+
+    assert [os.path.basename(files[0]) for files, _ in delivered] == ["with_llm.txt", "plain.txt"]
+    assert len(pending) == 1
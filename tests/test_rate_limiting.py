@@ -0,0 +1,80 @@
+import pytest
+
+from src.infrastructure.LLM.rate_limiting import CircuitOpenError, RemoteCallPolicy, is_transient_error
+
+
+class StatusError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+class FlakyCall:
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return "ok"
+
+
+def _policy(retries=3, failure_threshold=5):
+    return RemoteCallPolicy(requests_per_second=0, tokens_per_minute=0, retries=retries,
+                            failure_threshold=failure_threshold, base_delay=0, max_delay=0)
+
+
+@pytest.mark.parametrize("error, transient", [
+    (TimeoutError(), True),
+    (ConnectionResetError(), True),
+    (StatusError(429), True),
+    (StatusError(503), True),
+    (StatusError(400), False),
+    (StatusError(401), False),
+    (ValueError("bad prompt"), False),
+])
+def test_is_transient_error(error, transient):
+    assert is_transient_error(error) is transient
+
+
+def test_transient_errors_are_retried():
+    call = FlakyCall(TimeoutError(), StatusError(502))
+
+    assert _policy().call(call) == "ok"
+    assert call.calls == 3
+
+
+def test_non_transient_error_is_raised_without_retry():
+    call = FlakyCall(StatusError(400))
+    policy = _policy()
+
+    with pytest.raises(StatusError):
+        policy.call(call)
+
+    assert call.calls == 1
+    assert policy.stats()["retries"] == 0
+
+
+def test_non_transient_errors_do_not_open_circuit():
+    policy = _policy(retries=0, failure_threshold=2)
+
+    for _ in range(3):
+        with pytest.raises(StatusError):
+            policy.call(FlakyCall(StatusError(400)))
+
+    assert policy.call(FlakyCall()) == "ok"
+    assert policy.stats()["circuit_opened"] == 0
+
+
+def test_transient_errors_open_circuit():
+    policy = _policy(retries=0, failure_threshold=2)
+
+    for _ in range(2):
+        with pytest.raises(TimeoutError):
+            policy.call(FlakyCall(TimeoutError()))
+
+    with pytest.raises(CircuitOpenError):
+        policy.call(FlakyCall())
+    assert policy.stats()["circuit_opened"] == 1
@@ -0,0 +1,106 @@
+import asyncio
+import itertools
+
+from src.application.use_cases import FilesQueue
+from src.domain.constants import SchedulingPolicy
+from src.domain.entities import QueueElement
+from src.infrastructure.cash_repositories.redis_job_store import RedisJobStore
+
+
+class FakeRedis:
+    """Хэши и сортированные множества redis.asyncio в памяти; ключи и значения — bytes, как у redis-py."""
+
+    def __init__(self):
+        self.hashes = {}
+        self.zsets = {}
+
+    @staticmethod
+    def _bytes(value):
+        return value if isinstance(value, bytes) else str(value).encode()
+
+    async def hset(self, key, field, value):
+        self.hashes.setdefault(key, {})[self._bytes(field)] = self._bytes(value)
+
+    async def hsetnx(self, key, field, value):
+        self.hashes.setdefault(key, {}).setdefault(self._bytes(field), self._bytes(value))
+
+    async def hget(self, key, field):
+        return self.hashes.get(key, {}).get(self._bytes(field))
+
+    async def hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+    async def hdel(self, key, field):
+        self.hashes.get(key, {}).pop(self._bytes(field), None)
+
+    async def zadd(self, key, mapping):
+        self.zsets.setdefault(key, {}).update({self._bytes(k): v for k, v in mapping.items()})
+
+    async def zrem(self, key, member):
+        self.zsets.get(key, {}).pop(self._bytes(member), None)
+
+    async def zrangebyscore(self, key, low, high):
+        return [member for member, score in self.zsets.get(key, {}).items() if low <= score <= high]
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def __getattr__(self, name):
+        return lambda *args: self.commands.append(getattr(self.redis, name)(*args))
+
+    async def execute(self):
+        return [await command for command in self.commands]
+
+
+def _store(monkeypatch):
+    clock = itertools.count(1000)
+    monkeypatch.setattr("src.infrastructure.cash_repositories.redis_job_store.time.time", lambda: next(clock))
+    store = RedisJobStore()
+    store.r = FakeRedis()
+    return store
+
+
+def test_update_keeps_original_enqueue_order(monkeypatch):
+    async def scenario():
+        store = _store(monkeypatch)
+        queue = FilesQueue(policy=SchedulingPolicy.ROUND_ROBIN, store=store)
+        elements = [QueueElement(user_id=1, file_path=f"{name}.mp3", options={}) for name in ("a", "b", "c")]
+        for element in elements:
+            await queue.add_file_to_queue(element)
+
+        # предзагрузка обновляет первую задачу последней
+        elements[0].file_path = "a.wav"
+        await queue.update(elements[0], duration=30)
+
+        restored = FilesQueue(policy=SchedulingPolicy.ROUND_ROBIN, store=store)
+        await restored.restore()
+        return [(await restored.get_file_from_queue()) for _ in elements]
+
+    restored = asyncio.run(scenario())
+
+    assert [(element.file_path, element.duration) for element in restored] == \
+        [("a.wav", 30), ("b.mp3", None), ("c.mp3", None)]
+
+
+def test_ack_forgets_enqueue_time(monkeypatch):
+    async def scenario():
+        store = _store(monkeypatch)
+        await store.save("job", {"job_id": "job"})
+        await store.ack("job")
+        return store.r.hashes
+
+    hashes = asyncio.run(scenario())
+
+    assert all(not values for values in hashes.values())
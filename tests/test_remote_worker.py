@@ -0,0 +1,85 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from src.application.use_cases import FilesQueue, TranscriberQueueProcessor, TranscriptionWorker, WorkerLostError
+from src.domain.entities import QueueElement
+
+
+class FakeBroker:
+    def __init__(self, consume_errors=0):
+        self.jobs = []
+        self.results = []
+        self.consume_errors = consume_errors
+        self.claimed = False
+
+    async def publish_job(self, record):
+        self.jobs.append(record)
+
+    async def consume_job(self, timeout=5):
+        if self.consume_errors:
+            self.consume_errors -= 1
+            raise ConnectionError("redis is restarting")
+        if self.jobs:
+            return self.jobs.pop(0)
+        await asyncio.sleep(0.01)
+        return None
+
+    async def is_queued(self, job_id):
+        return not self.claimed
+
+    async def publish_result(self, result):
+        self.results.append(result)
+
+    async def consume_result(self, timeout=5):
+        await asyncio.sleep(timeout)
+        return None
+
+
+def _element():
+    return QueueElement(user_id=1, file_path="a.mp3", options={"formats": [], "prompts": []})
+
+
+def test_worker_survives_broker_errors(monkeypatch):
+    monkeypatch.setattr(TranscriptionWorker, "HEARTBEAT_INTERVAL", 0.01)
+
+    async def transcribe(**kwargs):
+        return ["a.txt"]
+
+    async def scenario():
+        broker = FakeBroker(consume_errors=2)
+        await broker.publish_job(_element().model_dump(mode="json"))
+        worker = TranscriptionWorker(SimpleNamespace(transcribe=transcribe), broker)
+        task = asyncio.create_task(worker.start())
+        while not any(not result.get("heartbeat") for result in broker.results):
+            await asyncio.sleep(0.01)
+        worker.stop()
+        await task
+        return broker.results
+
+    results = asyncio.run(asyncio.wait_for(scenario(), 10))
+
+    assert results[-1]["output_files"] == ["a.txt"]
+
+
+def _processor(broker):
+    return TranscriberQueueProcessor(SimpleNamespace(queue=FilesQueue(), user_service=None),
+                                     broker=broker, heartbeat_timeout=0.2)
+
+
+def test_job_claimed_without_heartbeat_is_reported_lost():
+    broker = FakeBroker()
+    broker.claimed = True
+
+    with pytest.raises(WorkerLostError):
+        asyncio.run(asyncio.wait_for(_processor(broker).transcribe_remote(_element()), 5))
+
+
+def test_job_waiting_at_broker_is_not_reported_lost():
+    async def scenario():
+        processor = _processor(FakeBroker())
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(processor.transcribe_remote(_element()), 0.8)
+
+    asyncio.run(scenario())
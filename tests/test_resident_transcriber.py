@@ -0,0 +1,25 @@
+import os
+import subprocess
+import sys
+import textwrap
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_interpreter_exits_when_worker_is_not_stopped(tmp_path):
+    script = tmp_path / "crash.py"
+    script.write_text(textwrap.dedent(f"""
+        from src.infrastructure.transcriber.resident_transcriber import ResidentWhisperTranscriber
+
+        if __name__ == "__main__":
+            transcriber = ResidentWhisperTranscriber({{"transcripts_dir": {str(tmp_path)!r},
+                                                      "script_path": {str(tmp_path / "diarize.py")!r}}})
+            transcriber.start()
+            raise RuntimeError("падение вне транскрибера")
+    """))
+
+    process = subprocess.run([sys.executable, str(script)], cwd=ROOT, env={**os.environ, "PYTHONPATH": ROOT},
+                             capture_output=True, text=True, timeout=30)
+
+    assert process.returncode == 1
+    assert "падение вне транскрибера" in process.stderr
@@ -0,0 +1,112 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from conftest import FakeAIService
+from src.application.use_cases import ApplicationService
+from src.infrastructure.LLM.async_ai_service import AsyncAIService
+from src.presentation.bot.controllers import TranscribumController
+from src.presentation.bot.streaming import ThrottledMessage
+from src.presentation.bot.views import TranscibumViews
+
+
+class FakeBot:
+    """Запоминает отправленные сообщения и правки; правка «идёт по сети» edit_delay секунд."""
+
+    def __init__(self, edit_delay=0.0):
+        self.edit_delay = edit_delay
+        self.texts = {}
+        self.edits = []
+        self.next_id = 0
+
+    async def send_message(self, chat_id, text):
+        self.next_id += 1
+        self.texts[self.next_id] = text
+        return SimpleNamespace(message_id=self.next_id)
+
+    async def edit_message_text(self, text, chat_id, message_id):
+        assert text.strip(), "Telegram отклоняет пустой текст"
+        await asyncio.sleep(self.edit_delay)
+        self.texts[message_id] = text
+        self.edits.append((message_id, text))
+
+
+def _controller(bot, ai_service):
+    config = SimpleNamespace(TRANSCRIPTS_DIR="transcripts", STREAM_EDIT_INTERVAL=0.01)
+    service = ApplicationService(service=None, file_service=None, user_service=None, queue=None,
+                                 link_service=None, ai_service=ai_service, config=config,
+                                 async_ai_service=AsyncAIService(ai_service))
+    return TranscribumController(config=config, bot=bot, transcriber_service=service)
+
+
+def test_final_answer_is_the_last_edit():
+    answer = " ".join(f"слово{i}" for i in range(30))
+    bot = FakeBot(edit_delay=0.02)
+    controller = _controller(bot, FakeAIService({"summary": answer, "post": "пост"}, delay=0.01))
+
+    asyncio.run(controller.handle_ai_jobs("a.txt", ["summary", "post"], user_id=1))
+
+    assert bot.texts == {1: answer, 2: "пост"}
+    assert [text for message_id, text in bot.edits if message_id == 1][-1] == answer
+    assert len([1 for message_id, _ in bot.edits if message_id == 1]) < 30
+
+
+def test_stop_waits_for_cancelled_flush():
+    async def scenario():
+        bot = FakeBot(edit_delay=0.05)
+        message = ThrottledMessage(bot, 1, interval=0.01)
+        await message.start("⏳")
+        message.update("черновик", content=True)
+        await asyncio.sleep(0.01)
+        flush = message.task
+        await message.finish("итог")
+        await asyncio.sleep(0.1)
+        return bot, flush
+
+    bot, flush = asyncio.run(scenario())
+
+    assert flush.done()
+    assert bot.texts[1] == "итог"
+    assert bot.edits[-1] == (1, "итог")
+
+
+def test_empty_answer_is_replaced():
+    bot = FakeBot()
+    controller = _controller(bot, FakeAIService({"summary": ""}, delay=0.01))
+
+    asyncio.run(controller.handle_ai_jobs("a.txt", ["summary"], user_id=1))
+
+    assert bot.texts[1] == TranscibumViews.ai_job_empty()
+
+
+def test_error_replaces_placeholders():
+    bot = FakeBot()
+    controller = _controller(bot, FakeAIService({}, error=RuntimeError("YandexGPT недоступен")))
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(controller.handle_ai_jobs("a.txt", ["summary", "post"], user_id=1))
+
+    assert bot.texts == {1: TranscibumViews.ai_job_error(), 2: TranscibumViews.ai_job_error()}
+
+
+def test_failing_draft_edit_does_not_block_final_answer():
+    class FlakyBot(FakeBot):
+        async def edit_message_text(self, text, chat_id, message_id):
+            if text == "черновик":
+                raise ConnectionError("network is unreachable")
+            await super().edit_message_text(text, chat_id, message_id)
+
+    async def scenario():
+        bot = FlakyBot()
+        message = ThrottledMessage(bot, 1, interval=0.01)
+        await message.start("⏳")
+        message.update("черновик", content=True)
+        await asyncio.sleep(0.05)
+        assert not message.task.done()
+        await message.finish("итог")
+        return bot
+
+    bot = asyncio.run(scenario())
+
+    assert bot.texts[1] == "итог"
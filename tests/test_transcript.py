@@ -0,0 +1,78 @@
+from src.domain.transcript import (Transcript, ms_to_srt_time, read_srt, srt_time_to_ms, structured_path,
+                                   write_srt)
+from src.infrastructure.render_service import render
+from src.infrastructure.transcript_cache import DiskTranscriptCache
+
+SRT = """﻿1
+00:00:00,000 --> 00:00:02,500
+Speaker 0: Привет всем.
+
+2
+00:00:02,500 --> 00:01:05,040
+Speaker 1: Здравствуйте,
+как дела?
+
+3
+01:02:03,004 --> 01:02:04,000
+без спикера
+"""
+
+
+def test_srt_time_round_trip():
+    assert srt_time_to_ms("01:02:03,004") == 3723004
+    assert srt_time_to_ms(" 00:00:01.5 ") == 1500
+    assert srt_time_to_ms("00:00:01,05") == 1050
+    assert srt_time_to_ms("00:00:01,0509") == 1050
+    assert ms_to_srt_time(3723004) == "01:02:03,004"
+    assert ms_to_srt_time(3723004, ".") == "01:02:03.004"
+
+
+def test_read_srt_parses_speakers_and_multiline_text(tmp_path):
+    path = tmp_path / "a.srt"
+    path.write_text(SRT, encoding="utf-8")
+
+    assert read_srt(str(path)) == [
+        {"start_time": 0, "end_time": 2500, "speaker": "Speaker 0", "text": "Привет всем."},
+        {"start_time": 2500, "end_time": 65040, "speaker": "Speaker 1", "text": "Здравствуйте, как дела?"},
+        {"start_time": 3723004, "end_time": 3724000, "speaker": "", "text": "без спикера"},
+    ]
+
+
+def test_trs_round_trip_and_exports(tmp_path):
+    path = tmp_path / "a.srt"
+    path.write_text(SRT, encoding="utf-8")
+    transcript = Transcript.from_srt(str(path))
+
+    transcript.write(str(tmp_path / "a.trs"))
+    restored = Transcript.read(str(tmp_path / "a.trs"))
+    assert list(restored) == list(transcript)
+
+    restored.to_srt(str(tmp_path / "b.srt"))
+    assert list(Transcript.from_srt(str(tmp_path / "b.srt"))) == list(transcript)
+    restored.to_vtt(str(tmp_path / "b.vtt"))
+    vtt = (tmp_path / "b.vtt").read_text(encoding="utf-8")
+    assert vtt.startswith("WEBVTT\n\n00:00:00.000 --> 00:00:02.500\n<v Speaker 0>Привет всем.")
+
+
+def test_write_srt_matches_reader(tmp_path):
+    segments = [(0, 1000, "Speaker 0", "один"), (1000, 2000, "Speaker 1", "два")]
+    write_srt(segments, str(tmp_path / "a.srt"))
+
+    assert list(Transcript.from_srt(str(tmp_path / "a.srt"))) == segments
+
+
+def test_subtitles_render_after_transcript_cache_hit(tmp_path):
+    source = tmp_path / "source.txt"
+    source.write_text("Speaker 0: Привет всем.", encoding="utf-8")
+    (tmp_path / "source.srt").write_text(SRT, encoding="utf-8")
+    Transcript.from_srt(str(tmp_path / "source.srt")).write(structured_path(str(source)))
+    cache = DiskTranscriptCache(str(tmp_path / "cache"), max_bytes=1 << 20)
+    cache.put("key", str(source))
+
+    restored = tmp_path / "user" / "audio.txt"
+    restored.parent.mkdir()
+    assert cache.get("key", str(restored))
+
+    for ext in ("srt", "vtt"):
+        assert render(str(restored), ext) == str(restored.with_suffix(f".{ext}"))
+    assert read_srt(str(restored.with_suffix(".srt")))[1]["speaker"] == "Speaker 1"
@@ -0,0 +1,45 @@
+from src.infrastructure.transcript_cache import DiskTranscriptCache
+
+
+def _write_transcript(directory, name, text):
+    base = directory / name
+    base.with_suffix(".txt").write_text(text)
+    base.with_suffix(".srt").write_text(f"1\n00:00:00,000 --> 00:00:01,000\nSpeaker 0: {text}\n")
+    base.with_suffix(".trs").write_bytes(b"TRS1" + text.encode())
+    return base
+
+
+def test_hit_restores_srt_and_trs(tmp_path):
+    cache = DiskTranscriptCache(str(tmp_path / "cache"), max_bytes=1 << 20)
+    source = _write_transcript(tmp_path, "source", "hello")
+    cache.put("k", str(source.with_suffix(".txt")))
+
+    dest = tmp_path / "out" / "audio.txt"
+    dest.parent.mkdir()
+    assert cache.get("k", str(dest))
+
+    assert dest.read_text() == "hello"
+    assert dest.with_suffix(".srt").read_text() == source.with_suffix(".srt").read_text()
+    assert dest.with_suffix(".trs").read_bytes() == b"TRS1hello"
+
+
+def test_key_depends_on_options(tmp_path):
+    cache = DiskTranscriptCache(str(tmp_path / "cache"), max_bytes=1 << 20)
+    media = tmp_path / "audio.mp3"
+    media.write_bytes(b"audio")
+
+    assert cache.make_key(str(media), {"model": "large-v3", "device": "cuda"}) != \
+        cache.make_key(str(media), {"model": "large-v3", "device": "cpu"})
+
+
+def test_eviction_drops_whole_entry(tmp_path):
+    cache_dir = tmp_path / "cache"
+    cache = DiskTranscriptCache(str(cache_dir), max_bytes=200)
+    for i in range(5):
+        source = _write_transcript(tmp_path, f"source{i}", f"text {i}")
+        cache.put(f"k{i}", str(source.with_suffix(".txt")))
+
+    keys = {path.stem for path in cache_dir.iterdir()}
+    for key in keys:
+        assert {path.suffix for path in cache_dir.glob(f"{key}.*")} == {".txt", ".srt", ".trs"}
+    assert "k4" in keys and "k0" not in keys
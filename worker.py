@@ -0,0 +1,73 @@
+import asyncio
+import logging
+import os
+
+from config.config_reader import config
+from src.application.use_cases import UserService, ApplicationService, TranscriptionWorker
+from src.infrastructure.common_services import FileService, LinkService
+from src.infrastructure.media_service import AsyncMediaService
+from src.infrastructure.render_service import ProcessRenderService
+from src.infrastructure.transcript_cache import DiskTranscriptCache
+from src.infrastructure.transcriber.whisper_transcriber import WhisperTranscriber
+from src.infrastructure.transcriber.resident_transcriber import ResidentWhisperTranscriber
+from src.infrastructure.transcriber.chunked_transcriber import ChunkedTranscriber
+from src.infrastructure.repositories.sqlalchemy_user_repository import SQLAlchemyUserRepository
+from src.infrastructure.cash_repositories.cash_user_repository import CashUserRepository
+from src.infrastructure.cash_repositories.redis_job_broker import RedisJobBroker
+
+# Узел транскрибации для REMOTE_TRANSCRIBERS=true.
+# DOWNLOADS_DIR и TRANSCRIPTS_DIR должны указывать на то же общее хранилище, что и у бота.
+# nohup python worker.py > worker.log 2>&1 &
+async def main():
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(levelname)s - %(name)s - %(message)s",
+    )
+
+    transcriber_cls = ResidentWhisperTranscriber if config.WHISPER_RESIDENT else WhisperTranscriber
+
+    def worker_dir(worker_id):
+        return os.path.join(config.TRANSCRIPTS_DIR, f"worker_{os.getpid()}_{worker_id}")
+
+    def make_transcriber(worker_id):
+        settings = {'device': config.WHISPER_DEVICE,
+                    'model': config.WHISPER_MODEL,
+                    'stream_decode': config.STREAM_DECODE,
+                    "transcripts_dir": config.TRANSCRIPTS_DIR,
+                    "workdir": worker_dir(worker_id)}
+        if not config.CHUNKED_TRANSCRIPTION:
+            return transcriber_cls(settings)
+        return ChunkedTranscriber({**settings,
+                                   'split_threshold': config.CHUNK_SPLIT_THRESHOLD,
+                                   'chunk_seconds': config.CHUNK_SECONDS,
+                                   'overlap': config.CHUNK_OVERLAP,
+                                   'pool_size': config.CHUNK_POOL_SIZE},
+                                  transcriber_factory=lambda i: transcriber_cls({**settings,
+                                                                                 "workdir": f"{worker_dir(worker_id)}_chunk_{i}"}))
+
+    transcribers = [make_transcriber(worker_id) for worker_id in range(max(1, config.TRANSCRIBER_WORKERS))]
+
+    user_service = UserService(repo=SQLAlchemyUserRepository(), cash_repo=CashUserRepository())
+    transcript_cache = None
+    if config.TRANSCRIPT_CACHE_MAX_MB:
+        transcript_cache = DiskTranscriptCache(config.TRANSCRIPT_CACHE_DIR, config.TRANSCRIPT_CACHE_MAX_MB * 1024 * 1024)
+    application_service = ApplicationService(service=transcribers[0],
+                                             file_service=FileService,
+                                             user_service=user_service,
+                                             queue=None,
+                                             ai_service=None,
+                                             link_service=LinkService,
+                                             config=config,
+                                             media_service=AsyncMediaService(config.MEDIA_CONCURRENCY, config.PROBE_CONCURRENCY),
+                                             transcript_cache=transcript_cache,
+                                             render_service=ProcessRenderService(config.RENDER_PROCESSES))
+    broker = RedisJobBroker()
+    workers = [TranscriptionWorker(application_service, broker,
+                                   transcriber=transcriber,
+                                   transcripts_path=worker_dir(worker_id))
+               for worker_id, transcriber in enumerate(transcribers)]
+    await asyncio.gather(*(worker.start() for worker in workers))
+
+
+if __name__ == '__main__':
+    asyncio.run(main())